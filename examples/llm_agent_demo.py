@@ -29,13 +29,19 @@ async def main():
         "Create a training config with batch size 64 and epochs 10",
     ]
     
-    for i, query in enumerate(queries, 1):
+    # Queries are independent, so send them to the LLM concurrently
+    responses = await asyncio.gather(
+        *(agent.process_message(query) for query in queries),
+        return_exceptions=True
+    )
+    
+    for i, (query, response) in enumerate(zip(queries, responses), 1):
         print(f"\n[Query {i}] {query}")
         print("-" * 60)
         
-        response = await agent.process_message(query)
-        
-        if response.get("success"):
+        if isinstance(response, Exception):
+            print(f"✗ Error: {response}")
+        elif response.get("success"):
             print(f"✓ Task Submitted:")
             print(f"  Task: {response['task_name']}")
             print(f"  Task ID: {response['task_id']}")
@@ -1,11 +1,49 @@
 """Simple LLM agent for TaaS."""
 
+import asyncio
+import hashlib
 import json
-from typing import Dict, Any, Optional, List
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from openai import AsyncOpenAI
 
 from taas_client.client import TaasClient
 
+try:
+    # orjson's decode error subclasses json.JSONDecodeError
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
+# Parsed LLM extractions kept per agent, keyed by (system prompt hash, message)
+_RESPONSE_CACHE_SIZE = 1024
+
+# Fixed parts of the system prompt; only the task list is built per agent
+_PROMPT_PRE = """You are a helpful AI assistant that can execute ML tasks on a TaaS server.
+
+Available tasks:
+"""
+
+_PROMPT_POST = """
+
+When a user asks to perform a task, you should:
+1. Identify which task to use
+2. Extract the required inputs from the user's message
+3. Return a JSON object with the task name and inputs
+
+Respond ONLY with JSON in this format:
+{
+    "task_name": "task_name_here",
+    "inputs": {"param1": "value1", "param2": "value2"}
+}
+
+If you need more information from the user, respond with:
+{
+    "clarification_needed": true,
+    "question": "What information do you need?"
+}
+"""
+
 
 class SimpleLLMAgent:
     """
@@ -19,18 +57,34 @@ class SimpleLLMAgent:
         taas_host: str = "localhost",
         taas_port: int = 50051,
         llm_api_key: Optional[str] = None,
-        llm_model: str = "gpt-4"
+        llm_model: str = "gpt-4-turbo",
+        max_concurrent: int = 4
     ):
-        """Initialize the LLM agent."""
+        """
+        Initialize the LLM agent.
+        
+        Args:
+            taas_host: TaaS server host
+            taas_port: TaaS server port
+            llm_api_key: OpenAI API key
+            llm_model: Model used to extract tasks; must support JSON mode
+            max_concurrent: Maximum LLM requests in flight when messages are
+                processed concurrently, to stay within rate limits
+        """
         self.taas_client = TaasClient(host=taas_host, port=taas_port)
         self.llm_client = AsyncOpenAI(api_key=llm_api_key) if llm_api_key else None
         self.llm_model = llm_model
-       self.available_tasks: List[Dict[str, Any]] = []
+        self.available_tasks: List[Dict[str, Any]] = []
+        self._system_prompt: Optional[str] = None
+        self._system_prompt_sha: Optional[str] = None
+        self._response_cache: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._llm_semaphore = asyncio.Semaphore(max_concurrent)
     
     async def initialize(self) -> None:
         """Initialize the agent (connect to TaaS and fetch available tasks)."""
         await self.taas_client.connect()
         self.available_tasks = await self.taas_client.list_tasks()
+        self._set_system_prompt()
         print(f"✓ Connected to TaaS server")
         print(f"✓ Found {len(self.available_tasks)} available tasks")
     
@@ -38,6 +92,20 @@ class SimpleLLMAgent:
         """Close connections."""
         await self.taas_client.close()
     
+    def _get_system_prompt(self) -> str:
+        """Get the system prompt, built once per task list."""
+        if self._system_prompt is None:
+            self._set_system_prompt()
+        return self._system_prompt
+    
+    def _set_system_prompt(self) -> None:
+        """Build the system prompt and the hash that keys cached responses."""
+        self._system_prompt = self._create_system_prompt()
+        self._system_prompt_sha = hashlib.blake2b(
+            self._system_prompt.encode(),
+            digest_size=16
+        ).hexdigest()
+    
     def _create_system_prompt(self) -> str:
         """Create system prompt with available tasks."""
         tasks_desc = "\n".join([
@@ -45,28 +113,7 @@ class SimpleLLMAgent:
             for task in self.available_tasks
         ])
         
-        return f"""You are a helpful AI assistant that can execute ML tasks on a TaaS server.
-
-Available tasks:
-{tasks_desc}
-
-When a user asks to perform a task, you should:
-1. Identify which task to use
-2. Extract the required inputs from the user's message
-3. Return a JSON object with the task name and inputs
-
-Respond ONLY with JSON in this format:
-{{
-    "task_name": "task_name_here",
-    "inputs": {{"param1": "value1", "param2": "value2"}}
-}}
-
-If you need more information from the user, respond with:
-{{
-    "clarification_needed": true,
-    "question": "What information do you need?"
-}}
-"""
+        return f"{_PROMPT_PRE}{tasks_desc}{_PROMPT_POST}"
     
     async def process_message(self, user_message: str) -> Dict[str, Any]:
         """
@@ -84,21 +131,42 @@ If you need more information from the user, respond with:
                 "error": "LLM not configured. Please provide task name and inputs as JSON."
             }
         
-        # Call LLM to extract task and inputs
-        response = await self.llm_client.chat.completions.create(
-            model=self.llm_model,
-            messages=[
-                {"role": "system", "content": self._create_system_prompt()},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.1
-        )
+        system_prompt = self._get_system_prompt()
+        cache_key = (self._system_prompt_sha, user_message)
+        parsed = self._response_cache.get(cache_key)
         
-        llm_response = response.choices[0].message.content
+        if parsed is not None:
+            self._response_cache.move_to_end(cache_key)
+        else:
+            # Call LLM to extract task and inputs; JSON mode guarantees a
+            # syntactically valid object
+            async with self._llm_semaphore:
+                response = await self.llm_client.chat.completions.create(
+                    model=self.llm_model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_message}
+                    ],
+                    temperature=0.1,
+                    response_format={"type": "json_object"}
+                )
+            
+            llm_response = response.choices[0].message.content
+            
+            try:
+                parsed = _json_loads(llm_response)
+            except json.JSONDecodeError:
+                return {
+                    "error": "Could not parse LLM response",
+                    "llm_response": llm_response
+                }
+            
+            if isinstance(parsed, dict):
+                self._response_cache[cache_key] = parsed
+                if len(self._response_cache) > _RESPONSE_CACHE_SIZE:
+                    self._response_cache.popitem(last=False)
         
         try:
-            parsed = json.loads(llm_response)
-            
             # Check if clarification needed
             if parsed.get("clarification_needed"):
                 return {
@@ -127,11 +195,6 @@ If you need more information from the user, respond with:
                 "message": result["message"]
             }
             
-        except json.JSONDecodeError:
-            return {
-                "error": "Could not parse LLM response",
-                "llm_response": llm_response
-            }
         except Exception as e:
             return {
                 "error": f"Error executing task: {str(e)}"
@@ -11,8 +11,8 @@ async def demo_agent():
     print("Task Planning Agent Demo")
     print("="*60)
     
-    # Initialize database
-    init_database()
+    # Initialize off the event loop; engine setup and schema creation block
+    await asyncio.to_thread(init_database)
     
     # Create agent
     agent = TaskPlanningAgent(user_id="demo_user")
@@ -11,8 +11,8 @@ async def demo_debug_learning():
     print("Demo: Debug Context Manager")
     print("="*60)
     
-    # Initialize
-    init_database("sqlite:///debug_demo.db")
+    # Initialize off the event loop; engine setup and schema creation block
+    await asyncio.to_thread(init_database, "sqlite:///debug_demo.db")
     debug_mgr = get_debug_manager()
     
     # Simulate error 1: Missing parameter
@@ -48,6 +48,7 @@ async def demo_debug_learning():
     await debug_mgr.mark_resolution_success(resolution_id, success=True)
     await debug_mgr.mark_resolution_success(resolution_id, success=True)
     await debug_mgr.mark_resolution_success(resolution_id, success=False)
+    await debug_mgr.flush()  # Outcomes are buffered until flushed
     print(f"✓ Updated success rate: 66.7%")
     
     # Simulate same error again
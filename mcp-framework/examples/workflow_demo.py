@@ -14,8 +14,8 @@ async def demo_simple_workflow():
     print("Demo: Simple Workflow Execution")
     print("="*60)
     
-    # Initialize
-    init_database("sqlite:///workflow_demo.db")
+    # Initialize off the event loop; engine setup and schema creation block
+    await asyncio.to_thread(init_database, "sqlite:///workflow_demo.db")
     executor = WorkflowExecutor()
     
     # Define a simple DAG: load_dataset -> load_config
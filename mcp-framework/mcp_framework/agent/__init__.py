@@ -1,11 +1,29 @@
 """Agent package."""
 
+import importlib
+
 from mcp_framework.agent.base_agent import BaseAgent, AgentProvider, Message, AgentResponse
-from mcp_framework.agent.openai_agent import OpenAIAgent
-from mcp_framework.agent.anthropic_agent import AnthropicAgent
 from mcp_framework.agent.agent_manager import AgentManager, get_agent_manager
 from mcp_framework.agent.task_planning_agent import TaskPlanningAgent
 
+# Provider agents pull in their SDKs, so they are imported on first access
+_LAZY_AGENTS = {
+    "OpenAIAgent": "mcp_framework.agent.openai_agent",
+    "AnthropicAgent": "mcp_framework.agent.anthropic_agent",
+}
+
+
+def __getattr__(name: str):
+    """Lazily import provider agent classes (PEP 562)."""
+    module_name = _LAZY_AGENTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+
 __all__ = [
     "BaseAgent",
     "AgentProvider",
@@ -1,27 +1,35 @@
 """Agent manager for switching between providers."""
 
-from typing import Dict, Any, Optional, Type
+import importlib
+import time
+from typing import Dict, Any, Optional, Type, Tuple, Hashable, Union
 from enum import Enum
 
 from mcp_framework.agent.base_agent import BaseAgent, AgentProvider
-from mcp_framework.agent.openai_agent import OpenAIAgent
-from mcp_framework.agent.anthropic_agent import AnthropicAgent
 from mcp_framework.config import settings
 
 
 class AgentManager:
     """Manages agent instances and provider switching."""
     
-    # Registry of available agents
-    _agents: Dict[AgentProvider, Type[BaseAgent]] = {
-        AgentProvider.OPENAI: OpenAIAgent,
-        AgentProvider.ANTHROPIC: AnthropicAgent,
+    # Registry of available agents. Built-in providers are "module:Class"
+    # paths so their SDKs are only imported when first used.
+    _agents: Dict[AgentProvider, Union[str, Type[BaseAgent]]] = {
+        AgentProvider.OPENAI: "mcp_framework.agent.openai_agent:OpenAIAgent",
+        AgentProvider.ANTHROPIC: "mcp_framework.agent.anthropic_agent:AnthropicAgent",
     }
     
-    def __init__(self):
-        """Initialize agent manager."""
+    def __init__(self, max_idle_seconds: float = 3600.0):
+        """
+        Initialize agent manager.
+        
+        Args:
+            max_idle_seconds: Drop cached agents unused for longer than this
+        """
         self._current_provider: AgentProvider = AgentProvider(settings.llm_provider)
-        self._instances: Dict[AgentProvider, BaseAgent] = {}
+        self._instances: Dict[Tuple[Hashable, ...], BaseAgent] = {}
+        self._last_used: Dict[Tuple[Hashable, ...], float] = {}
+        self.max_idle_seconds = max_idle_seconds
     
     @classmethod
     def register_agent(cls, agent_class: Type[BaseAgent]) -> None:
@@ -34,12 +42,21 @@ class AgentManager:
         provider = agent_class.get_provider()
         cls._agents[provider] = agent_class
     
-    def get_agent(self, provider: Optional[AgentProvider] = None) -> BaseAgent:
+    def get_agent(
+        self,
+        provider: Optional[AgentProvider] = None,
+        config_overrides: Optional[Dict[str, Any]] = None
+    ) -> BaseAgent:
         """
         Get agent instance for provider.
         
+        Instances are cached per (provider, configuration), so callers with
+        identical settings share an agent while different settings coexist.
+        
         Args:
             provider: Provider to use (uses current if None)
+            config_overrides: Optional settings (e.g. temperature) merged over
+                the provider defaults
         
         Returns:
             Agent instance
@@ -47,24 +64,62 @@ class AgentManager:
         if provider is None:
             provider = self._current_provider
         
-        # Return cached instance if exists
-        if provider in self._instances:
-            return self._instances[provider]
-        
-        # Create new instance
-        agent_class = self._agents.get(provider)
-        if agent_class is None:
-            raise ValueError(f"Unknown provider: {provider}")
+        agent_class = self._resolve_agent_class(provider)
         
         # Get configuration
         config = self._get_provider_config(provider)
+        if config_overrides:
+            config.update(config_overrides)
+        
+        key = self._make_cache_key(provider, config)
+        now = time.monotonic()
+        self._reap_idle(now)
         
-        # Create and cache instance
-        agent = agent_class(**config)
-        self._instances[provider] = agent
+        # Return cached instance if exists
+        agent = self._instances.get(key)
+        if agent is None:
+            # Create and cache instance
+            agent = agent_class(**config)
+            self._instances[key] = agent
         
+        self._last_used[key] = now
         return agent
     
+    @classmethod
+    def _resolve_agent_class(cls, provider: AgentProvider) -> Type[BaseAgent]:
+        """Get the agent class for a provider, importing it on first use."""
+        entry = cls._agents.get(provider)
+        if entry is None:
+            raise ValueError(f"Unknown provider: {provider}")
+        
+        if isinstance(entry, str):
+            module_name, class_name = entry.split(":")
+            entry = getattr(importlib.import_module(module_name), class_name)
+            cls._agents[provider] = entry
+        
+        return entry
+    
+    @staticmethod
+    def _make_cache_key(provider: AgentProvider, config: Dict[str, Any]) -> Tuple[Hashable, ...]:
+        """Build a hashable cache key from provider and configuration."""
+        # repr() keeps the key hashable for dict/list config values
+        return (provider, tuple(sorted((name, repr(value)) for name, value in config.items())))
+    
+    def _reap_idle(self, now: float) -> None:
+        """Drop cached agents that have not been used within max_idle_seconds."""
+        expired = [
+            key for key, last_used in self._last_used.items()
+            if now - last_used > self.max_idle_seconds
+        ]
+        for key in expired:
+            self._instances.pop(key, None)
+            del self._last_used[key]
+    
+    def clear_cache(self) -> None:
+        """Drop all cached agent instances."""
+        self._instances.clear()
+        self._last_used.clear()
+    
     def switch_provider(self, provider: AgentProvider) -> BaseAgent:
         """
         Switch to different provider.
@@ -5,9 +5,25 @@ from typing import List, Dict, Any, Optional, AsyncIterator
 from anthropic import AsyncAnthropic
 
 from mcp_framework.agent.base_agent import (
-    BaseAgent, AgentProvider, Message, AgentResponse, ToolCall
+    BaseAgent, AgentProvider, Message, AgentResponse, ToolCall, PreparedTools
 )
 
+# Anthropic only has user and assistant turns; anything else maps to assistant
+_ROLE_MAP = {"user": "user"}
+
+# SDK clients shared per API key: agents with different settings (model,
+# temperature) reuse one warm connection pool instead of each opening its own
+_clients: Dict[Optional[str], AsyncAnthropic] = {}
+
+
+def _get_client(api_key: Optional[str]) -> AsyncAnthropic:
+    """Get the shared Anthropic client for an API key."""
+    client = _clients.get(api_key)
+    if client is None or client.is_closed():
+        client = AsyncAnthropic(api_key=api_key)
+        _clients[api_key] = client
+    return client
+
 
 class AnthropicAgent(BaseAgent):
     """Anthropic Claude agent."""
@@ -20,7 +36,13 @@ class AnthropicAgent(BaseAgent):
     ):
         """Initialize Anthropic agent."""
         super().__init__(model=model, **kwargs)
-        self.client = AsyncAnthropic(api_key=api_key)
+        self.client = _get_client(api_key)
+        # Request arguments shared by every call, merged with the per-call ones
+        self._base_kwargs = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature
+        }
     
     @classmethod
     def get_provider(cls) -> AgentProvider:
@@ -30,20 +52,27 @@ class AnthropicAgent(BaseAgent):
         """Convert to Anthropic message format. Returns (system, messages)."""
         system = None
         anthropic_messages = []
+        append = anthropic_messages.append  # Bound once; runs per message
         
         for msg in messages:
-            if msg.role == "system":
+            role = msg.role
+            if role == "system":
                 system = msg.content
             else:
-                message_dict = {
-                    "role": "user" if msg.role == "user" else "assistant",
+                append({
+                    "role": _ROLE_MAP.get(role, "assistant"),
                     "content": msg.content
-                }
-                anthropic_messages.append(message_dict)
+                })
         
         return system, anthropic_messages
     
-    def _convert_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @classmethod
+    def prepare_tools(cls, tools: List[Dict[str, Any]]) -> PreparedTools:
+        """Convert MCP tools to Anthropic format once, for reuse across calls."""
+        return PreparedTools(cls._convert_tools(tools))
+    
+    @classmethod
+    def _convert_tools(cls, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Convert MCP tools to Anthropic format."""
         anthropic_tools = []
         
@@ -65,18 +94,13 @@ class AnthropicAgent(BaseAgent):
         """Send chat request to Anthropic."""
         system, anthropic_messages = self._convert_messages(messages)
         
-        kwargs = {
-            "model": self.model,
-            "messages": anthropic_messages,
-            "max_tokens": self.max_tokens,
-            "temperature": self.temperature
-        }
+        kwargs = {**self._base_kwargs, "messages": anthropic_messages}
         
         if system:
             kwargs["system"] = system
         
         if tools:
-            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tools"] = self._resolve_tools(tools)
         
         response = await self.client.messages.create(**kwargs)
         
@@ -97,9 +121,8 @@ class AnthropicAgent(BaseAgent):
         return AgentResponse(
             message=message_content,
             tool_calls=tool_calls,
-            finish_reason=response.stop_reason,
-            raw_response=response.model_dump()
-        )
+            finish_reason=response.stop_reason
+        ).set_raw_source(response)
     
     async def chat_stream(
         self,
@@ -109,18 +132,13 @@ class AnthropicAgent(BaseAgent):
         """Stream chat response from Anthropic."""
         system, anthropic_messages = self._convert_messages(messages)
         
-        kwargs = {
-            "model": self.model,
-            "messages": anthropic_messages,
-            "max_tokens": self.max_tokens,
-            "temperature": self.temperature
-        }
+        kwargs = {**self._base_kwargs, "messages": anthropic_messages}
         
         if system:
             kwargs["system"] = system
         
         if tools:
-            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tools"] = self._resolve_tools(tools)
         
         async with self.client.messages.stream(**kwargs) as stream:
             async for text in stream.text_stream:
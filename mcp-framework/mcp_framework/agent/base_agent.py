@@ -1,8 +1,8 @@
 """Base agent interface for Task Planning."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional, AsyncIterator
-from pydantic import BaseModel
+from typing import Dict, Any, List, Optional, AsyncIterator, Tuple
+from pydantic import BaseModel, ConfigDict, PrivateAttr
 from enum import Enum
 
 
@@ -16,6 +16,8 @@ class AgentProvider(str, Enum):
 
 class Message(BaseModel):
     """Chat message."""
+    model_config = ConfigDict(extra="forbid")
+    
     role: str  # user, assistant, system, tool
     content: str
     tool_calls: Optional[List[Dict[str, Any]]] = None
@@ -24,17 +26,48 @@ class Message(BaseModel):
 
 class ToolCall(BaseModel):
     """Tool call request."""
+    model_config = ConfigDict(extra="forbid")
+    
     id: str
     name: str
     arguments: Dict[str, Any]
+    
+    _cached_dump: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary, serializing only once per instance."""
+        if self._cached_dump is None:
+            self._cached_dump = self.model_dump()
+        return self._cached_dump
 
 
 class AgentResponse(BaseModel):
     """Agent response."""
+    model_config = ConfigDict(extra="forbid")
+    
     message: str
     tool_calls: List[ToolCall] = []
     finish_reason: str = "stop"  # stop, tool_calls, length
     raw_response: Optional[Dict[str, Any]] = None
+    
+    # Provider SDK response, dumped only if get_raw_response() is called
+    _raw_source: Any = PrivateAttr(default=None)
+    
+    def set_raw_source(self, source: Any) -> "AgentResponse":
+        """Attach the SDK response object without serializing it."""
+        self._raw_source = source
+        return self
+    
+    def get_raw_response(self) -> Optional[Dict[str, Any]]:
+        """Get the provider response as a dict, dumping the SDK object once."""
+        if self.raw_response is None and self._raw_source is not None:
+            self.raw_response = self._raw_source.model_dump()
+            self._raw_source = None
+        return self.raw_response
+
+
+class PreparedTools(list):
+    """Tool list already converted to a provider's native format."""
 
 
 class BaseAgent(ABC):
@@ -60,6 +93,10 @@ class BaseAgent(ABC):
         self.temperature = temperature
         self.max_tokens = max_tokens
         self.kwargs = kwargs
+        # Snapshot of the last unprepared tool list seen by _resolve_tools
+        # and its conversion
+        self._tools_snapshot: Optional[Tuple[Dict[str, Any], ...]] = None
+        self._tools_prepared: Optional[PreparedTools] = None
     
     @abstractmethod
     async def chat(
@@ -105,6 +142,41 @@ class BaseAgent(ABC):
         """Get provider type."""
         pass
     
+    @classmethod
+    def prepare_tools(cls, tools: List[Dict[str, Any]]) -> PreparedTools:
+        """
+        Convert MCP tools to this provider's native format.
+        
+        The result can be passed as ``tools`` to ``chat``/``chat_stream`` to
+        skip per-call conversion. The default keeps the MCP format.
+        
+        Args:
+            tools: Available tools (MCP tool format)
+        
+        Returns:
+            Provider-format tools
+        """
+        return PreparedTools(tools)
+    
+    def _resolve_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Get provider-format tools, converting unless already prepared.
+        
+        Callers usually pass the same tools every turn, so the last
+        conversion is reused while every tool entry is unchanged. Entries are
+        compared by identity first, then by value, so adding, removing or
+        replacing any tool triggers a fresh conversion. Edits made inside
+        a tool dict in place are not detected; replace the dict instead.
+        """
+        if isinstance(tools, PreparedTools):
+            return tools
+        
+        snapshot = tuple(tools)
+        if snapshot != self._tools_snapshot:
+            self._tools_prepared = self.prepare_tools(tools)
+            self._tools_snapshot = snapshot
+        return self._tools_prepared
+    
     @classmethod
     def create_from_config(cls, config: Dict[str, Any]) -> "BaseAgent":
         """Create agent from configuration."""
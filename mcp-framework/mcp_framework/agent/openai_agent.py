@@ -1,12 +1,25 @@
 """OpenAI agent implementation."""
 
-import json
 from typing import List, Dict, Any, Optional, AsyncIterator
 from openai import AsyncOpenAI
 
 from mcp_framework.agent.base_agent import (
-    BaseAgent, AgentProvider, Message, AgentResponse, ToolCall
+    BaseAgent, AgentProvider, Message, AgentResponse, ToolCall, PreparedTools
 )
+from mcp_framework.serialization import json_loads
+
+# SDK clients shared per API key: agents with different settings (model,
+# temperature) reuse one warm connection pool instead of each opening its own
+_clients: Dict[Optional[str], AsyncOpenAI] = {}
+
+
+def _get_client(api_key: Optional[str]) -> AsyncOpenAI:
+    """Get the shared OpenAI client for an API key."""
+    client = _clients.get(api_key)
+    if client is None or client.is_closed():
+        client = AsyncOpenAI(api_key=api_key)
+        _clients[api_key] = client
+    return client
 
 
 class OpenAIAgent(BaseAgent):
@@ -20,7 +33,13 @@ class OpenAIAgent(BaseAgent):
     ):
         """Initialize OpenAI agent."""
         super().__init__(model=model, **kwargs)
-        self.client = AsyncOpenAI(api_key=api_key)
+        self.client = _get_client(api_key)
+        # Request arguments shared by every call, merged with the per-call ones
+        self._base_kwargs = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "temperature": self.temperature
+        }
     
     @classmethod
     def get_provider(cls) -> AgentProvider:
@@ -29,6 +48,7 @@ class OpenAIAgent(BaseAgent):
     def _convert_messages(self, messages: List[Message]) -> List[Dict[str, Any]]:
         """Convert to OpenAI message format."""
         openai_messages = []
+        append = openai_messages.append  # Bound once; runs per message
         
         for msg in messages:
             message_dict = {
@@ -42,11 +62,17 @@ class OpenAIAgent(BaseAgent):
             if msg.tool_call_id:
                 message_dict["tool_call_id"] = msg.tool_call_id
             
-            openai_messages.append(message_dict)
+            append(message_dict)
         
         return openai_messages
     
-    def _convert_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    @classmethod
+    def prepare_tools(cls, tools: List[Dict[str, Any]]) -> PreparedTools:
+        """Convert MCP tools to OpenAI format once, for reuse across calls."""
+        return PreparedTools(cls._convert_tools(tools))
+    
+    @classmethod
+    def _convert_tools(cls, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Convert MCP tools to OpenAI function format."""
         openai_tools = []
         
@@ -71,15 +97,10 @@ class OpenAIAgent(BaseAgent):
         """Send chat request to OpenAI."""
         openai_messages = self._convert_messages(messages)
         
-        kwargs = {
-            "model": self.model,
-            "messages": openai_messages,
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens
-        }
+        kwargs = {**self._base_kwargs, "messages": openai_messages}
         
         if tools:
-            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tools"] = self._resolve_tools(tools)
             kwargs["tool_choice"] = "auto"
         
         response = await self.client.chat.completions.create(**kwargs)
@@ -94,15 +115,14 @@ class OpenAIAgent(BaseAgent):
                 tool_calls.append(ToolCall(
                     id=tc.id,
                     name=tc.function.name,
-                    arguments=json.loads(tc.function.arguments)
+                    arguments=json_loads(tc.function.arguments)
                 ))
         
         return AgentResponse(
             message=message.content or "",
             tool_calls=tool_calls,
-            finish_reason=choice.finish_reason,
-            raw_response=response.model_dump()
-        )
+            finish_reason=choice.finish_reason
+        ).set_raw_source(response)
     
     async def chat_stream(
         self,
@@ -112,16 +132,10 @@ class OpenAIAgent(BaseAgent):
         """Stream chat response from OpenAI."""
         openai_messages = self._convert_messages(messages)
         
-        kwargs = {
-            "model": self.model,
-            "messages": openai_messages,
-            "temperature": self.temperature,
-            "max_tokens": self.max_tokens,
-            "stream": True
-        }
+        kwargs = {**self._base_kwargs, "messages": openai_messages, "stream": True}
         
         if tools:
-            kwargs["tools"] = self._convert_tools(tools)
+            kwargs["tools"] = self._resolve_tools(tools)
             kwargs["tool_choice"] = "auto"
         
         stream = await self.client.chat.completions.create(**kwargs)
@@ -1,57 +1,107 @@
 """Task Planning Agent - Integrates LLM with MCP tools."""
 
-import json
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, Tuple
 
-from mcp_framework.agent.base_agent import BaseAgent, Message, ToolCall
+from mcp_framework.agent.base_agent import (
+    BaseAgent, AgentProvider, AgentResponse, Message, ToolCall
+)
 from mcp_framework.agent.agent_manager import get_agent_manager
 from mcp_framework.client.mcp_client import MCPClient
+from mcp_framework.serialization import json_dumps
 from mcp_framework.user_side.session_manager import get_session_manager
 import structlog
 
 logger = structlog.get_logger()
 
+# In-flight initializations keyed by (gateway URL, user_id), so concurrent
+# agents for the same user and gateway share one session lookup and tool listing
+_init_inflight: Dict[Tuple[str, str], "asyncio.Task[Tuple[str, List[Dict[str, Any]]]]"] = {}
+
 
 class TaskPlanningAgent:
     """High-level agent that uses LLM to plan and execute tasks using MCP tools."""
     
-    def __init__(self, mcp_url: str = "http://localhost:8000", user_id: str = "default"):
+    def __init__(
+        self,
+        mcp_url: str = "http://localhost:8000",
+        user_id: str = "default",
+        max_history_messages: int = 20
+    ):
         """
         Initialize task planning agent.
         
         Args:
             mcp_url: MCP Gateway URL
             user_id: User identifier
+            max_history_messages: Maximum messages sent to the LLM per call,
+                including the system message. The window is widened when
+                needed so a user turn and its tool results are never split.
         """
-        self.mcp_client = MCPClient(mcp_url)
+        self.mcp_client = MCPClient.get(mcp_url)
         self.agent_manager = get_agent_manager()
         self.session_manager = get_session_manager()
         self.user_id = user_id
         self.session_id: Optional[str] = None
         self.conversation_history: List[Message] = []
         self.available_tools: List[Dict[str, Any]] = []
+        self.max_history_messages = max_history_messages
+        self._event_buffer: List[Tuple[str, Dict[str, Any]]] = []
+        self._system_message: Optional[Message] = None
+        self._provider_tool_cache: Dict[AgentProvider, List[Dict[str, Any]]] = {}
     
     async def initialize(self) -> None:
         """Initialize session and fetch available tools."""
-        # Create or get session
-        self.session_id = await self.session_manager.get_or_create_session(self.user_id)
+        key = (self.mcp_client.base_url, self.user_id)
+        task = _init_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load_session_and_tools())
+            _init_inflight[key] = task
+            task.add_done_callback(lambda _: _init_inflight.pop(key, None))
         
-        # Fetch available tools
-        tools_response = await self.mcp_client.list_tools()
-        self.available_tools = tools_response['tools']
+        # Shield so one cancelled caller does not abort the shared load
+        self.session_id, tools = await asyncio.shield(task)
+        self._set_available_tools(tools)
         
-        logger.info(f"Initialized with {len(self.available_tools)} tools")
+        logger.info("initialized", tool_count=len(self.available_tools))
         
         # Add system message
-        system_msg = self._create_system_message()
-        self.conversation_history.append(system_msg)
+        self.conversation_history.append(self._get_system_message())
+    
+    async def _load_session_and_tools(self) -> Tuple[str, List[Dict[str, Any]]]:
+        """Create or get the user's session and fetch available tools."""
+        session_id = await self.session_manager.get_or_create_session(self.user_id)
+        tools_response = await self.mcp_client.list_tools()
+        return session_id, tools_response['tools']
+    
+    def _set_available_tools(self, tools: List[Dict[str, Any]]) -> None:
+        """Replace the tool list and invalidate the cached system message."""
+        self.available_tools = tools
+        self._system_message = None
+        self._provider_tool_cache = {}
+    
+    def _get_provider_tools(self, agent: BaseAgent) -> List[Dict[str, Any]]:
+        """Get tools in the agent's native format, converting once per provider."""
+        provider = agent.get_provider()
+        tools = self._provider_tool_cache.get(provider)
+        if tools is None:
+            tools = agent.prepare_tools(self.available_tools)
+            self._provider_tool_cache[provider] = tools
+        return tools
+    
+    def _get_system_message(self) -> Message:
+        """Get the system message, building it once per tool list."""
+        if self._system_message is None:
+            self._system_message = self._create_system_message()
+        return self._system_message
     
     def _create_system_message(self) -> Message:
         """Create system message with tool information."""
-        tools_desc = "\n".join([
+        tool_lines = [
             f"- {tool['name']}: {tool['description']}"
             for tool in self.available_tools
-        ])
+        ]
+        tools_desc = "\n".join(tool_lines)
         
         system_prompt = f"""You are a helpful AI assistant with access to the following tools via MCP:
 
@@ -64,7 +114,8 @@ When a user asks you to perform a task, you should:
 
 Be concise and helpful. Always explain what you're doing."""
         
-        return Message(role="system", content=system_prompt)
+        # Built from trusted tool metadata, so skip re-validation
+        return Message.model_construct(role="system", content=system_prompt)
     
     async def chat(self, user_message: str) -> str:
         """
@@ -76,110 +127,190 @@ Be concise and helpful. Always explain what you're doing."""
         Returns:
             Agent's response
         """
-        # Add user message
-        self.conversation_history.append(Message(role="user", content=user_message))
+        try:
+            return await self._chat_turn(user_message)
+        finally:
+            # Make the turn's events durable before returning
+            await self._flush_events()
+            await self.session_manager.flush()
+    
+    async def _chat_turn(self, user_message: str) -> str:
+        """Run one chat turn, buffering session events for a single flush."""
+        # Add user message. History messages are built from trusted values
+        # (validated agent responses, serialized tool results), so they are
+        # created with model_construct to skip Pydantic re-validation.
+        self.conversation_history.append(Message.model_construct(role="user", content=user_message))
+        self._compact_history()
         
         # Log to session
-        await self.session_manager.add_event(
-            self.session_id,
-            "user_message",
-            {"message": user_message}
-        )
+        self._log_event("user_message", {"message": user_message})
         
         # Get current agent
         agent = self.agent_manager.get_agent()
+        tools = self._get_provider_tools(agent)
+        
+        # Get agent response
+        response = await agent.chat(
+            messages=self.conversation_history,
+            tools=tools
+        )
+        
+        # Fast path: plain answer without tool calls
+        if not response.tool_calls:
+            return self._finish_turn(response.message)
         
-        # Chat loop (handle tool calls)
+        # Tool loop (at most max_iterations LLM calls per turn)
         max_iterations = 5
-        for iteration in range(max_iterations):
-            # Get agent response
+        for _ in range(max_iterations - 1):
+            await self._handle_tool_calls(response)
+            
             response = await agent.chat(
                 messages=self.conversation_history,
-                tools=self.available_tools
+                tools=tools
             )
             
             # If no tool calls, return response
             if not response.tool_calls:
-                assistant_msg = Message(role="assistant", content=response.message)
-                self.conversation_history.append(assistant_msg)
-                
-                # Log to session
-                await self.session_manager.add_event(
-                    self.session_id,
-                    "assistant_message",
-                    {"message": response.message}
-                )
-                
-                return response.message
-            
-            # Execute tool calls
-            tool_results = await self._execute_tool_calls(response.tool_calls)
-            
-            # Add assistant message with tool calls
-            self.conversation_history.append(Message(
-                role="assistant",
-                content=response.message or "Using tools...",
-                tool_calls=[tc.model_dump() for tc in response.tool_calls]
-            ))
-            
-            # Add tool results
-            for tool_call, result in zip(response.tool_calls, tool_results):
-                self.conversation_history.append(Message(
-                    role="tool",
-                    content=json.dumps(result),
-                    tool_call_id=tool_call.id
-                ))
+                return self._finish_turn(response.message)
         
+        await self._handle_tool_calls(response)
         return "Maximum iterations reached. Please try rephrasing your request."
     
-    async def _execute_tool_calls(self, tool_calls: List[ToolCall]) -> List[Dict[str, Any]]:
-        """Execute MCP tool calls."""
-        results = []
+    def _finish_turn(self, message: str) -> str:
+        """Record the final assistant message of a turn and return it."""
+        self.conversation_history.append(Message.model_construct(role="assistant", content=message))
+        
+        # Log to session
+        self._log_event("assistant_message", {"message": message})
+        
+        return message
+    
+    async def _handle_tool_calls(self, response: AgentResponse) -> None:
+        """Execute the response's tool calls and add them to the history."""
+        tool_results = await self._execute_tool_calls(response.tool_calls)
+        
+        # Add assistant message with tool calls
+        self.conversation_history.append(Message.model_construct(
+            role="assistant",
+            content=response.message or "Using tools...",
+            tool_calls=[tc.to_dict() for tc in response.tool_calls]
+        ))
+        
+        # Add tool results
+        for tool_call, result in zip(response.tool_calls, tool_results):
+            self.conversation_history.append(Message.model_construct(
+                role="tool",
+                content=json_dumps(result),
+                tool_call_id=tool_call.id
+            ))
         
+        self._compact_history()
+    
+    def _compact_history(self) -> None:
+        """Trim history to a rolling window of whole turns, keeping the system message."""
+        history = self.conversation_history
+        if len(history) <= self.max_history_messages:
+            return
+        
+        keep_system = history[0].role == "system"
+        head = history[:1] if keep_system else []
+        start = max(len(head), len(history) - (self.max_history_messages - len(head)))
+        
+        # Providers expect the conversation to open on a user message, and tool
+        # results must follow the assistant message that requested them, so
+        # never split a turn: drop the partial older turn, or widen the window
+        # back to the start of the current turn when it alone is too long
+        end = start
+        while end < len(history) and history[end].role != "user":
+            end += 1
+        if end < len(history):
+            start = end
+        else:
+            while start > len(head) and history[start].role != "user":
+                start -= 1
+        
+        self.conversation_history = head + history[start:]
+    
+    async def _execute_tool_calls(self, tool_calls: List[ToolCall]) -> List[Dict[str, Any]]:
+        """Execute MCP tool calls, preserving call order."""
+        # Parallel calls go out as one batch; the client falls back to
+        # concurrent per-tool calls if the gateway has no batch endpoint
+        if len(tool_calls) > 1:
+            return await self._run_tool_batch(tool_calls)
+        return [await self._run_one_tool(tool_calls[0])] if tool_calls else []
+    
+    async def _run_tool_batch(self, tool_calls: List[ToolCall]) -> List[Dict[str, Any]]:
+        """Execute several MCP tool calls in one batch request."""
         for tool_call in tool_calls:
-            logger.info(f"Executing tool: {tool_call.name}")
-            
-            # Log to session
-            await self.session_manager.add_event(
-                self.session_id,
-                "tool_call",
-                {
-                    "tool": tool_call.name,
-                    "arguments": tool_call.arguments
-                }
+            logger.info("executing_tool", tool=tool_call.name)
+            self._log_event("tool_call", {
+                "tool": tool_call.name,
+                "arguments": tool_call.arguments
+            })
+        
+        try:
+            results = await self.mcp_client.call_tools([
+                {"name": tc.name, "arguments": tc.arguments}
+                for tc in tool_calls
+            ])
+        except Exception as e:
+            logger.error("tool_batch_failed", tool_count=len(tool_calls), error=str(e))
+            return [{"error": str(e), "status": "FAILED"} for _ in tool_calls]
+        
+        for tool_call, result in zip(tool_calls, results):
+            self._log_event("tool_result", {
+                "tool": tool_call.name,
+                "result": result
+            })
+        
+        return results
+    
+    async def _run_one_tool(self, tool_call: ToolCall) -> Dict[str, Any]:
+        """Execute a single MCP tool call, returning a FAILED result on error."""
+        logger.info("executing_tool", tool=tool_call.name)
+        
+        # Log to session
+        self._log_event("tool_call", {
+            "tool": tool_call.name,
+            "arguments": tool_call.arguments
+        })
+        
+        try:
+            # Call tool via MCP
+            result = await self.mcp_client.call_tool(
+                tool_call.name,
+                tool_call.arguments
             )
             
-            try:
-                # Call tool via MCP
-                result = await self.mcp_client.call_tool(
-                    tool_call.name,
-                    tool_call.arguments
-                )
-                results.append(result)
-                
-                # Log result
-                await self.session_manager.add_event(
-                    self.session_id,
-                    "tool_result",
-                    {
-                        "tool": tool_call.name,
-                        "result": result
-                    }
-                )
+            # Log result
+            self._log_event("tool_result", {
+                "tool": tool_call.name,
+                "result": result
+            })
             
-            except Exception as e:
-                logger.error(f"Tool call failed: {e}")
-                results.append({
-                    "error": str(e),
-                    "status": "FAILED"
-                })
+            return result
         
-        return results
+        except Exception as e:
+            logger.error("tool_call_failed", tool=tool_call.name, error=str(e))
+            return {
+                "error": str(e),
+                "status": "FAILED"
+            }
+    
+    def _log_event(self, event_type: str, event_data: Dict[str, Any]) -> None:
+        """Buffer a session event until the next flush."""
+        self._event_buffer.append((event_type, event_data))
+    
+    async def _flush_events(self) -> None:
+        """Write all buffered session events in one round-trip."""
+        if not self._event_buffer:
+            return
+        
+        events, self._event_buffer = self._event_buffer, []
+        await self.session_manager.add_events(self.session_id, events)
     
     def switch_provider(self, provider: str) -> str:
         """Switch LLM provider."""
-        from mcp_framework.agent.base_agent import AgentProvider
-        
         try:
             new_provider = AgentProvider(provider)
             self.agent_manager.switch_provider(new_provider)
@@ -193,4 +324,6 @@ Be concise and helpful. Always explain what you're doing."""
     
     async def close(self) -> None:
         """Close connections."""
+        await self._flush_events()
+        await self.session_manager.flush()
         await self.mcp_client.close()
@@ -1,27 +1,155 @@
 """MCP SSE Client for connecting to MCP Gateway."""
 
 import asyncio
+import importlib.util
+import re
+import time
+import weakref
 import httpx
 import json
-from typing import Dict, Any, Optional, AsyncIterator
+from typing import Callable, Dict, Any, Optional, AsyncIterator, List, Tuple, TypeVar
 from rich.console import Console
 from rich.json import JSON
 
+from mcp_framework.serialization import (
+    MSGPACK_AVAILABLE, MSGPACK_STREAM_MEDIA_TYPE, json_dumps_bytes, json_loads,
+    split_msgpack_frames
+)
+
 console = Console()
 
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 keep-alive without it
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# WebSocket workflow streaming needs the optional websockets package
+_WEBSOCKETS_AVAILABLE = importlib.util.find_spec("websockets") is not None
+
+# SSE events are separated by a blank line
+_SSE_FRAME_RE = re.compile(rb"\r?\n\r?\n")
+
+T = TypeVar("T")
+
+# Connection pool shared by MCPClient instances, one per event loop since
+# httpx connections cannot be reused once the loop they were opened on closes
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# list_tools responses cached per (base_url, category); the tool registry
+# rarely changes, so agents sharing a gateway reuse one fetch
+_TOOLS_TTL = 30.0
+_tools_cache: Dict[Tuple[str, Optional[str]], Tuple[float, Dict[str, Any]]] = {}
+# Locks coalescing list_tools misses, per event loop like the shared pool
+_tools_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Tuple[str, Optional[str]], asyncio.Lock]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+# Reference-counted clients shared per gateway URL (see MCPClient.get)
+_client_registry: Dict[str, "MCPClient"] = {}
+
+
+def _create_http_client() -> httpx.AsyncClient:
+    """Create a pooled HTTP client for talking to the MCP Gateway."""
+    # Fail fast on connect, but leave room for long-running tool calls
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(60.0, connect=5.0),
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=200,
+            max_keepalive_connections=100,
+            keepalive_expiry=30.0
+        )
+    )
+
+
+def _loop_local(store: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, T]", factory: Callable[[], T]) -> T:
+    """
+    Get the running event loop's entry in a per-loop store.
+    
+    Entries for closed loops are dropped when a new one is created; their
+    connections and locks may reference the loop, so they would otherwise
+    keep it alive.
+    """
+    loop = asyncio.get_running_loop()
+    value = store.get(loop)
+    if value is None:
+        for stale in [other for other in store if other.is_closed()]:
+            del store[stale]
+        value = store[loop] = factory()
+    return value
+
+
+def get_shared_client() -> httpx.AsyncClient:
+    """Get the running event loop's shared HTTP client, creating it on first use."""
+    client = _loop_local(_shared_clients, _create_http_client)
+    if client.is_closed:
+        client = _shared_clients[asyncio.get_running_loop()] = _create_http_client()
+    return client
+
+
+def _parse_sse_frame(frame: bytes) -> Optional[Dict[str, Any]]:
+    """Parse the data lines of one SSE frame into an event dict."""
+    data_lines = [
+        line[5:].lstrip(b" ")
+        for line in frame.splitlines()
+        if line.startswith(b"data:")
+    ]
+    if not data_lines:
+        return None
+    
+    data = b"\n".join(data_lines)
+    try:
+        return json_loads(data)
+    except json.JSONDecodeError:
+        console.print(f"[yellow]Invalid JSON: {data.decode(errors='replace')}[/yellow]")
+        return None
+
 
 class MCPClient:
     """HTTP-SSE client for MCP Gateway."""
     
-    def __init__(self, base_url: str = "http://localhost:8000"):
+    def __init__(self, base_url: str = "http://localhost:8000", private: bool = False):
         """
         Initialize MCP client.
         
         Args:
             base_url: Base URL of MCP Gateway
+            private: Use a dedicated connection pool instead of the shared one
         """
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.private = private
+        self._private_client = _create_http_client() if private else None
+        self._ref_count = 0
+        self._batch_supported: Optional[bool] = None  # Detected on first call_tools
+        self._ws_supported: Optional[bool] = None  # Detected on first workflow stream
+    
+    @classmethod
+    def get(cls, base_url: str = "http://localhost:8000") -> "MCPClient":
+        """
+        Get the process-wide client for a gateway URL.
+        
+        Each call takes a reference that must be released with close().
+        
+        Args:
+            base_url: Base URL of MCP Gateway
+        
+        Returns:
+            Shared client instance
+        """
+        key = base_url.rstrip("/")
+        client = _client_registry.get(key)
+        if client is None:
+            client = cls(key)
+            _client_registry[key] = client
+        client._ref_count += 1
+        return client
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client for the running event loop."""
+        if self._private_client is not None:
+            return self._private_client
+        return get_shared_client()
     
     async def health_check(self) -> Dict[str, Any]:
         """Check server health."""
@@ -37,15 +165,34 @@ class MCPClient:
             category: Optional category filter (UTILITY, TRAINING, ADMIN)
         
         Returns:
-            Dictionary with tools list
+            Dictionary with tools list (cached for a short TTL; do not mutate)
         """
-        params = {}
-        if category:
-            params["category"] = category
+        key = (self.base_url, category or None)
+        cached = _tools_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _TOOLS_TTL:
+            return cached[1]
         
-        response = await self.client.get(f"{self.base_url}/mcp/tools", params=params)
-        response.raise_for_status()
-        return response.json()
+        # Coalesce concurrent cache misses into a single request
+        lock = _loop_local(_tools_locks, dict).setdefault(key, asyncio.Lock())
+        async with lock:
+            cached = _tools_cache.get(key)
+            if cached is not None and time.monotonic() - cached[0] < _TOOLS_TTL:
+                return cached[1]
+            
+            params = {}
+            if category:
+                params["category"] = category
+            
+            response = await self.client.get(f"{self.base_url}/mcp/tools", params=params)
+            response.raise_for_status()
+            tools = json_loads(response.content)
+            _tools_cache[key] = (time.monotonic(), tools)
+            return tools
+    
+    @classmethod
+    def invalidate_tools_cache(cls) -> None:
+        """Drop cached list_tools responses so the next call refetches."""
+        _tools_cache.clear()
     
     async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -63,7 +210,48 @@ class MCPClient:
             json={"name": name, "arguments": arguments}
         )
         response.raise_for_status()
-        return response.json()
+        return json_loads(response.content)
+    
+    async def call_tools(
+        self,
+        calls: List[Dict[str, Any]],
+        max_concurrent: int = 8
+    ) -> List[Dict[str, Any]]:
+        """
+        Call several tools in a single round-trip.
+        
+        Uses the gateway's batch endpoint, falling back to concurrent
+        per-tool calls if the gateway does not provide one.
+        
+        Args:
+            calls: List of {"name": ..., "arguments": ...} dicts
+            max_concurrent: Maximum calls the gateway runs at once
+        
+        Returns:
+            One result per call, in order; failed calls are reported per item
+            with status FAILED instead of raising
+        """
+        if self._batch_supported is not False:
+            response = await self.client.post(
+                f"{self.base_url}/mcp/batch",
+                json={"calls": calls, "max_concurrent": max_concurrent}
+            )
+            if response.status_code != 404:
+                response.raise_for_status()
+                self._batch_supported = True
+                return json_loads(response.content)["results"]
+            self._batch_supported = False
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        
+        async def call_one(call: Dict[str, Any]) -> Dict[str, Any]:
+            try:
+                async with semaphore:
+                    return await self.call_tool(call["name"], call["arguments"])
+            except Exception as e:
+                return {"tool": call["name"], "status": "FAILED", "error": str(e)}
+        
+        return list(await asyncio.gather(*(call_one(call) for call in calls)))
     
     async def execute_workflow_streaming(
         self,
@@ -80,22 +268,128 @@ class MCPClient:
         Yields:
             Progress events
         """
+        async for batch in self.execute_workflow_streaming_batches(dag, user_id):
+            for event in batch:
+                yield event
+    
+    async def execute_workflow_streaming_batches(
+        self,
+        dag: Dict[str, Any],
+        user_id: str = "test_user",
+        max_batch_size: int = 32
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Execute workflow with streaming, yielding events in batches.
+        
+        Uses the gateway's WebSocket endpoint when the websockets package is
+        installed (one event per message), otherwise the HTTP stream. On
+        the HTTP stream, all events that arrive in the same network read are
+        parsed together and yielded as one list, so bursts of progress
+        events cross the async boundary once rather than once per event.
+        
+        Args:
+            dag: Workflow DAG
+            user_id: User identifier
+            max_batch_size: Maximum number of events per batch
+        
+        Yields:
+            Lists of progress events
+        """
+        if _WEBSOCKETS_AVAILABLE and self._ws_supported is not False:
+            import websockets
+            
+            try:
+                async for batch in self._stream_workflow_ws(dag, user_id):
+                    yield batch
+                return
+            except websockets.exceptions.InvalidHandshake:
+                # Gateway without the WebSocket endpoint; use HTTP from now on
+                self._ws_supported = False
+            except websockets.exceptions.ConnectionClosed as e:
+                # 1007 means the request was rejected before any event was
+                # sent; retry over HTTP, which reports validation errors in full
+                if e.rcvd is None or e.rcvd.code != 1007:
+                    raise
+        
+        # Prefer compact MessagePack frames; the gateway answers with SSE
+        # if it cannot produce them, so dispatch on the response type
         async with self.client.stream(
             "POST",
             f"{self.base_url}/mcp/workflow",
+            params={"encoding": "msgpack"} if MSGPACK_AVAILABLE else None,
             json={"dag": dag, "user_id": user_id},
             headers={"Accept": "text/event-stream"}
         ) as response:
             response.raise_for_status()
             
-            async for line in response.aiter_lines():
-                if line.startswith("data: "):
-                    data = line[6:]  # Remove "data: " prefix
-                    try:
-                        event = json.loads(data)
-                        yield event
-                    except json.JSONDecodeError:
-                        console.print(f"[yellow]Invalid JSON: {data}[/yellow]")
+            content_type = response.headers.get("content-type", "")
+            if content_type.startswith(MSGPACK_STREAM_MEDIA_TYPE):
+                batches = self._read_msgpack_batches(response, max_batch_size)
+            else:
+                batches = self._read_sse_batches(response, max_batch_size)
+            
+            async for batch in batches:
+                yield batch
+    
+    async def _stream_workflow_ws(
+        self,
+        dag: Dict[str, Any],
+        user_id: str
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Execute a workflow over the gateway's WebSocket endpoint."""
+        import websockets
+        
+        ws_url = re.sub(r"^http", "ws", self.base_url) + "/mcp/workflow/ws"
+        async with websockets.connect(ws_url, max_size=None) as websocket:
+            self._ws_supported = True
+            await websocket.send(json_dumps_bytes({"dag": dag, "user_id": user_id}))
+            
+            async for message in websocket:
+                event = json_loads(message)
+                yield [event]
+                if event.get("type") in ("complete", "error"):
+                    break
+    
+    @staticmethod
+    async def _read_sse_batches(
+        response: httpx.Response,
+        max_batch_size: int
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Parse an SSE response body into event batches."""
+        buffer = b""
+        async for chunk in response.aiter_bytes(chunk_size=8192):
+            frames = _SSE_FRAME_RE.split(buffer + chunk)
+            buffer = frames.pop()  # Incomplete trailing frame
+            
+            batch = []
+            for frame in frames:
+                event = _parse_sse_frame(frame)
+                if event is None:
+                    continue
+                batch.append(event)
+                if len(batch) >= max_batch_size:
+                    yield batch
+                    batch = []
+            
+            if batch:
+                yield batch
+        
+        # Stream ended without a trailing blank line
+        event = _parse_sse_frame(buffer)
+        if event is not None:
+            yield [event]
+    
+    @staticmethod
+    async def _read_msgpack_batches(
+        response: httpx.Response,
+        max_batch_size: int
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Parse a length-prefixed MessagePack response body into event batches."""
+        buffer = b""
+        async for chunk in response.aiter_bytes(chunk_size=8192):
+            events, buffer = split_msgpack_frames(buffer + chunk)
+            for start in range(0, len(events), max_batch_size):
+                yield events[start:start + max_batch_size]
     
     async def get_workflow_status(self, workflow_id: str) -> Dict[str, Any]:
         """
@@ -112,8 +406,16 @@ class MCPClient:
         return response.json()
     
     async def close(self):
-        """Close client connection."""
-        await self.client.aclose()
+        """Close client connection (the shared pool stays open)."""
+        if self._ref_count:
+            # Registry client: only release once the last holder closes
+            self._ref_count -= 1
+            if self._ref_count:
+                return
+            _client_registry.pop(self.base_url, None)
+        
+        if self._private_client is not None:
+            await self._private_client.aclose()
     
     async def __aenter__(self):
         """Async context manager enter."""
@@ -128,7 +430,7 @@ async def demo_client():
     """Demonstrate MCP client usage."""
     console.print("\n[bold cyan]MCP Client Demo[/bold cyan]\n")
     
-    async with MCPClient() as client:
+    async with MCPClient(private=True) as client:
         # Health check
         console.print("[bold]1. Health Check[/bold]")
         health = await client.health_check()
@@ -2,8 +2,8 @@
 
 import asyncio
 import json
-from typing import Optional
-from rich.console import Console
+from typing import List, Optional, Tuple
+from rich.console import Console, Group
 from rich.table import Table
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
@@ -12,6 +12,7 @@ from rich.live import Live
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
 from mcp_framework.client.mcp_client import MCPClient
+from mcp_framework.serialization import json_dumps, json_loads
 
 console = Console()
 
@@ -24,10 +25,14 @@ class MCPInspector:
         self.base_url = base_url
         self.client: Optional[MCPClient] = None
         self.current_tools = []
+        # Table rows for the last tool list seen; MCPClient returns the same
+        # cached list object until its TTL expires
+        self._tool_rows_source: Optional[list] = None
+        self._tool_rows: List[Tuple[str, str, str, str, str]] = []
     
     async def start(self):
         """Start inspector session."""
-        self.client = MCPClient(self.base_url)
+        self.client = MCPClient.get(self.base_url)
         
         console.print(Panel.fit(
             "[bold cyan]MCP Inspector[/bold cyan]\n"
@@ -41,6 +46,7 @@ class MCPInspector:
             console.print(f"[green]✓ Server is healthy: {health['status']}[/green]\n")
         except Exception as e:
             console.print(f"[red]✗ Failed to connect: {e}[/red]")
+            await self.client.close()
             return
         
         # Main menu loop
@@ -101,14 +107,8 @@ class MCPInspector:
         table.add_column("Description", style="white")
         table.add_column("Requires Isolation", style="magenta")
         
-        for idx, tool in enumerate(self.current_tools, 1):
-            table.add_row(
-                str(idx),
-                tool['name'],
-                tool['category'],
-                tool['description'][:50] + "..." if len(tool['description']) > 50 else tool['description'],
-                "Yes" if tool['requiresIsolation'] else "No"
-            )
+        for row in self._get_tool_rows(self.current_tools):
+            table.add_row(*row)
         
         console.print(table)
         
@@ -118,11 +118,27 @@ class MCPInspector:
             if 0 <= tool_idx < len(self.current_tools):
                 tool = self.current_tools[tool_idx]
                 console.print(Panel(
-                    JSON(json.dumps(tool, indent=2)),
+                    JSON(json_dumps(tool)),
                     title=f"[bold]{tool['name']}[/bold]",
                     border_style="green"
                 ))
     
+    def _get_tool_rows(self, tools: list) -> List[Tuple[str, str, str, str, str]]:
+        """Get inspector table rows for a tool list, formatting each list once."""
+        if tools is not self._tool_rows_source:
+            self._tool_rows = [
+                (
+                    str(idx),
+                    tool['name'],
+                    tool['category'],
+                    tool['description'][:50] + "..." if len(tool['description']) > 50 else tool['description'],
+                    "Yes" if tool['requiresIsolation'] else "No"
+                )
+                for idx, tool in enumerate(tools, 1)
+            ]
+            self._tool_rows_source = tools
+        return self._tool_rows
+    
     async def call_tool_interactive(self):
         """Interactively call a tool."""
         console.print("\n[bold cyan]Call Tool[/bold cyan]")
@@ -144,14 +160,14 @@ class MCPInspector:
         tool = self.current_tools[tool_idx]
         console.print(f"\n[bold]Selected: {tool['name']}[/bold]")
         console.print("Input Schema:")
-        console.print(JSON(json.dumps(tool['inputSchema'], indent=2)))
+        console.print(JSON(json_dumps(tool['inputSchema'])))
         
         # Get arguments
         console.print("\n[yellow]Enter arguments as JSON:[/yellow]")
         args_str = Prompt.ask("Arguments", default="{}")
         
         try:
-            arguments = json.loads(args_str)
+            arguments = json_loads(args_str)
         except json.JSONDecodeError:
             console.print("[red]Invalid JSON[/red]")
             return
@@ -162,7 +178,7 @@ class MCPInspector:
         
         # Show result
         console.print(Panel(
-            JSON(json.dumps(result, indent=2)),
+            JSON(json_dumps(result)),
             title="[bold green]Result[/bold green]",
             border_style="green"
         ))
@@ -212,13 +228,13 @@ class MCPInspector:
         else:
             dag_str = Prompt.ask("Enter DAG JSON")
             try:
-                dag = json.loads(dag_str)
+                dag = json_loads(dag_str)
             except json.JSONDecodeError:
                 console.print("[red]Invalid JSON[/red]")
                 return
         
         console.print("\n[bold]Workflow DAG:[/bold]")
-        console.print(JSON(json.dumps(dag, indent=2)))
+        console.print(JSON(json_dumps(dag)))
         
         if not Confirm.ask("\nExecute this workflow?", default=True):
             return
@@ -230,13 +246,20 @@ class MCPInspector:
         total_nodes = 0
         completed = 0
         
-        with Progress(
+        progress = Progress(
             SpinnerColumn(),
             TextColumn("[progress.description]{task.description}"),
             console=console
-        ) as progress:
-            task = progress.add_task("[cyan]Starting...", total=None)
-            
+        )
+        task = progress.add_task("[cyan]Starting...", total=None)
+        
+        results_table = Table(show_header=True, box=None, padding=(0, 2))
+        results_table.add_column("Node", style="green")
+        results_table.add_column("Result", style="white")
+        
+        # Render progress and node results as one live group, redrawn at a
+        # fixed rate instead of once per event
+        with Live(Group(progress, results_table), console=console, refresh_per_second=20):
             async for event in self.client.execute_workflow_streaming(dag):
                 event_type = event.get("type")
                 
@@ -252,12 +275,12 @@ class MCPInspector:
                         completed=completed,
                         description=f"[green]Completed: {event['node_id']}[/green]"
                     )
-                    console.print(f"  Result: {event.get('result', {})}")
+                    results_table.add_row(event['node_id'], str(event.get('result', {})))
                 
                 elif event_type == "workflow_completed":
                     progress.update(task, description="[bold green]✓ Workflow completed![/bold green]")
                     console.print(Panel(
-                        JSON(json.dumps(event.get('results', {}), indent=2)),
+                        JSON(json_dumps(event.get('results', {}))),
                         title="Final Results",
                         border_style="green"
                     ))
@@ -280,7 +303,7 @@ class MCPInspector:
                 status = await self.client.get_workflow_status(workflow_id)
             
             console.print(Panel(
-                JSON(json.dumps(status, indent=2)),
+                JSON(json_dumps(status)),
                 title=f"Workflow {workflow_id[:8]}...",
                 border_style="cyan"
             ))
@@ -291,35 +314,53 @@ class MCPInspector:
         """Run quick test suite."""
         console.print("\n[bold cyan]Quick Test Suite[/bold cyan]\n")
         
-        tests_passed = 0
-        tests_total = 0
+        # The checks are independent, so run them concurrently over the
+        # pooled connection instead of paying one round-trip after another.
+        # Each check reports its own errors, so one failure never cancels
+        # the others.
+        async with asyncio.TaskGroup() as tg:
+            tasks = [
+                tg.create_task(self._test_health()),
+                tg.create_task(self._test_list_tools()),
+                tg.create_task(self._test_call_tool())
+            ]
+        
+        tests_total = len(tasks)
+        tests_passed = sum(task.result() for task in tasks)
         
-        # Test 1: Health check
-        tests_total += 1
+        # Summary
+        console.print(f"\n[bold]Test Results: {tests_passed}/{tests_total} passed[/bold]")
+        if tests_passed == tests_total:
+            console.print("[bold green]All tests passed! ✓[/bold green]")
+        else:
+            console.print(f"[bold yellow]{tests_total - tests_passed} test(s) failed[/bold yellow]")
+    
+    async def _test_health(self) -> bool:
+        """Quick test: health check."""
         try:
             health = await self.client.health_check()
             if health.get("status") == "healthy":
                 console.print("[green]✓ Health check passed[/green]")
-                tests_passed += 1
-            else:
-                console.print("[red]✗ Health check failed[/red]")
+                return True
+            console.print("[red]✗ Health check failed[/red]")
         except Exception as e:
             console.print(f"[red]✗ Health check error: {e}[/red]")
-        
-        # Test 2: List tools
-        tests_total += 1
+        return False
+    
+    async def _test_list_tools(self) -> bool:
+        """Quick test: list tools."""
         try:
             tools = await self.client.list_tools()
             if tools.get("count", 0) > 0:
                 console.print(f"[green]✓ List tools passed ({tools['count']} tools)[/green]")
-                tests_passed += 1
-            else:
-                console.print("[yellow]⚠ No tools registered[/yellow]")
+                return True
+            console.print("[yellow]⚠ No tools registered[/yellow]")
         except Exception as e:
             console.print(f"[red]✗ List tools error: {e}[/red]")
-        
-        # Test 3: Call tool
-        tests_total += 1
+        return False
+    
+    async def _test_call_tool(self) -> bool:
+        """Quick test: call a tool."""
         try:
             result = await self.client.call_tool(
                 "load_dataset",
@@ -327,18 +368,11 @@ class MCPInspector:
             )
             if result.get("status") == "COMPLETED":
                 console.print("[green]✓ Tool call passed[/green]")
-                tests_passed += 1
-            else:
-                console.print(f"[yellow]⚠ Tool call status: {result.get('status')}[/yellow]")
+                return True
+            console.print(f"[yellow]⚠ Tool call status: {result.get('status')}[/yellow]")
         except Exception as e:
             console.print(f"[red]✗ Tool call error: {e}[/red]")
-        
-        # Summary
-        console.print(f"\n[bold]Test Results: {tests_passed}/{tests_total} passed[/bold]")
-        if tests_passed == tests_total:
-            console.print("[bold green]All tests passed! ✓[/bold green]")
-        else:
-            console.print(f"[bold yellow]{tests_total - tests_passed} test(s) failed[/bold yellow]")
+        return False
 
 
 async def main():
@@ -348,4 +382,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     asyncio.run(main())
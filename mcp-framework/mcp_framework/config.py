@@ -19,6 +19,10 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "postgresql://localhost/mcp_framework"
+    db_pool_size: int = 5  # Connections kept open
+    db_max_overflow: int = 15  # Extra connections allowed under load
+    db_pool_timeout: float = 30.0  # Seconds to wait for a free connection
+    db_pool_recycle: int = 1800  # Seconds before a connection is replaced
     
     # Storage
     artifact_store_path: str = "./artifacts"
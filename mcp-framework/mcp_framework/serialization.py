@@ -0,0 +1,80 @@
+"""Serialization helpers, using orjson and msgpack when they are installed."""
+
+import json
+import struct
+from typing import Any, List, Tuple, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Length-prefixed MessagePack frames: 4-byte big-endian size, then payload
+MSGPACK_STREAM_MEDIA_TYPE = "application/x-msgpack-stream"
+MSGPACK_AVAILABLE = msgpack is not None
+_FRAME_HEADER = struct.Struct(">I")
+
+if orjson is not None:
+    # Tool results may carry numpy arrays/scalars from training tools
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    """Serialize an object to UTF-8 encoded JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+    return json.dumps(obj).encode()
+
+
+def json_dumps(obj: Any) -> str:
+    """Serialize an object to a JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(obj)
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    """
+    Deserialize JSON from str or bytes.
+
+    Raises:
+        json.JSONDecodeError: If the data is not valid JSON (orjson's error
+            type is a subclass, so callers only need to catch this one)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def msgpack_frame(obj: Any) -> bytes:
+    """Encode an object as one length-prefixed MessagePack frame."""
+    payload = msgpack.packb(obj, use_bin_type=True)
+    return _FRAME_HEADER.pack(len(payload)) + payload
+
+
+def split_msgpack_frames(data: bytes) -> Tuple[List[Any], bytes]:
+    """
+    Decode all complete length-prefixed MessagePack frames in a buffer.
+    
+    Args:
+        data: Buffered stream bytes
+    
+    Returns:
+        Tuple of (decoded objects, bytes of the incomplete trailing frame)
+    """
+    objects = []
+    offset = 0
+    header_size = _FRAME_HEADER.size
+    while len(data) - offset >= header_size:
+        (size,) = _FRAME_HEADER.unpack_from(data, offset)
+        end = offset + header_size + size
+        if end > len(data):
+            break
+        objects.append(msgpack.unpackb(data[offset + header_size:end], raw=False))
+        offset = end
+    return objects, data[offset:]
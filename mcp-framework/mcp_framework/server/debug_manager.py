@@ -1,15 +1,116 @@
 """Debug Context Manager - Learns from errors and suggests fixes."""
 
+import asyncio
+import functools
 import hashlib
-from typing import Dict, Any, List, Optional
+import re
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional, Tuple, TypeVar
 from datetime import datetime
 
+from sqlalchemy import Float, bindparam, cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as SQLASession
+
 from mcp_framework.storage.database import get_db_manager
-from mcp_framework.storage.models import ErrorSignature, Resolution
+from mcp_framework.storage.models import ErrorSignature, Resolution, generate_uuid
 import structlog
 
+try:
+    import re2  # google-re2: linear-time matching without backtracking
+except ImportError:
+    re2 = None
+
 logger = structlog.get_logger()
 
+T = TypeVar("T")
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE
+_UPSERT_INSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+# Debug hints per (signature hash, min_confidence) are served from memory
+# for this long; resolution changes through this manager invalidate them
+_HINT_CACHE_TTL = 5.0
+_HINT_CACHE_SIZE = 1024
+
+# Resolution outcomes are buffered and written together once this many
+# resolutions have pending counts, or after this many seconds
+_OUTCOME_FLUSH_SIZE = 64
+_OUTCOME_FLUSH_DELAY = 0.05
+
+# Dynamic parts stripped from error messages before hashing. [^"]* keeps the
+# path match linear on long stack traces even with the backtracking re engine.
+_regex = re2 or re
+_UUID_RE = _regex.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+_PATH_RE = _regex.compile(r'File "[^"]*", line \d+')
+
+
+@functools.lru_cache(maxsize=4096)
+def _error_signature(error_type: str, error_message: str, tool_name: str) -> str:
+    """Hash a normalized error; cached since failing runs repeat the same errors."""
+    # Normalize error message (remove dynamic parts like IDs, timestamps)
+    normalized = error_message
+    
+    # Remove UUIDs
+    normalized = _UUID_RE.sub('<UUID>', normalized)
+    
+    # Remove file paths with line numbers
+    normalized = _PATH_RE.sub('File "<PATH>", line <NUM>', normalized)
+    
+    # Create signature
+    sig_string = f"{error_type}:{tool_name or 'UNKNOWN'}:{normalized}"
+    
+    # 128-bit BLAKE2b: faster than SHA-256 on short inputs and wide enough
+    # for a lookup key; 32 hex chars keep the unique index narrow
+    return hashlib.blake2b(sig_string.encode(), digest_size=16).hexdigest()
+
+
+# Adds buffered outcome counts to one resolution; run with executemany.
+# SET expressions all see the old row values, so the rate needs no read.
+_outcome_update = update(Resolution.__table__).where(
+    Resolution.id == bindparam("resolution_id")
+).values(
+    applied_count=Resolution.applied_count + bindparam("applied"),
+    success_count=Resolution.success_count + bindparam("succeeded"),
+    success_rate=(
+        cast(Resolution.success_count + bindparam("succeeded"), Float)
+        / cast(Resolution.applied_count + bindparam("applied"), Float)
+    )
+)
+
+# Error type distribution plus the resolution total in one round-trip; the
+# unique error total is the sum of the per-type counts
+_stats_select = select(
+    ErrorSignature.error_type,
+    func.count(),
+    select(func.count()).select_from(Resolution).scalar_subquery()
+).group_by(ErrorSignature.error_type)
+
+
+def _suggest_parameter_change(data: Dict[str, Any]) -> str:
+    return f"Try changing parameter '{data.get('parameter')}' to {data.get('new_value')}"
+
+
+def _suggest_dependency_fix(data: Dict[str, Any]) -> str:
+    return f"Install or update dependency: {data.get('dependency')}"
+
+
+def _suggest_input_modification(data: Dict[str, Any]) -> str:
+    return f"Modify input field '{data.get('field')}': {data.get('suggestion')}"
+
+
+# Suggestion text per resolution type; register new types here
+_SUGGESTION_FORMATTERS: Dict[str, Callable[[Dict[str, Any]], str]] = {
+    "parameter_change": _suggest_parameter_change,
+    "dependency_fix": _suggest_dependency_fix,
+    "input_modification": _suggest_input_modification,
+}
+
 
 class DebugHint:
     """Debug hint suggestion."""
@@ -42,6 +143,29 @@ class DebugContextManager:
     def __init__(self):
         """Initialize debug context manager."""
         self.db_manager = get_db_manager()
+        # (signature_hash, min_confidence) -> (monotonic expiry, hints)
+        self._hint_cache: "OrderedDict[Tuple[str, float], Tuple[float, List[DebugHint]]]" = OrderedDict()
+        self._signature_hashes: Dict[str, str] = {}  # signature id -> hash
+        # resolution id -> [applied, succeeded] not yet written
+        self._pending_outcomes: Dict[str, List[int]] = {}
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()  # Held while outcomes are being written
+    
+    async def _run_db(self, work: Callable[[SQLASession], T]) -> T:
+        """
+        Run database work in one transaction on a worker thread.
+        
+        Args:
+            work: Function receiving the session; must return plain values
+        
+        Returns:
+            The function's result
+        """
+        def run() -> T:
+            with self.db_manager.get_session() as db_session:
+                return work(db_session)
+        
+        return await asyncio.to_thread(run)
     
     def _compute_error_signature(
         self,
@@ -60,20 +184,17 @@ class DebugContextManager:
         Returns:
             Signature hash
         """
-        # Normalize error message (remove dynamic parts like IDs, timestamps)
-        normalized = error_message
-        
-        # Remove UUIDs
-        import re
-        normalized = re.sub(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}', '<UUID>', normalized)
-        
-        # Remove file paths with line numbers
-        normalized = re.sub(r'File ".*", line \d+', 'File "<PATH>", line <NUM>', normalized)
-        
-        # Create signature
-        sig_string = f"{error_type}:{tool_name or 'UNKNOWN'}:{normalized}"
+        return _error_signature(error_type, error_message, tool_name or "")
+    
+    def _invalidate_hints(self, error_signature_id: Optional[str]) -> None:
+        """Drop cached hints for a signature (all hints if it is unknown here)."""
+        signature_hash = self._signature_hashes.get(error_signature_id)
+        if signature_hash is None:
+            self._hint_cache.clear()
+            return
         
-        return hashlib.sha256(sig_string.encode()).hexdigest()
+        for key in [key for key in self._hint_cache if key[0] == signature_hash]:
+            del self._hint_cache[key]
     
     async def capture_error(
         self,
@@ -102,7 +223,38 @@ class DebugContextManager:
         
         logger.info(f"Capturing error: {error_type} in {tool_name}")
         
-        with self.db_manager.get_session() as session:
+        def capture(session: SQLASession) -> str:
+            now = datetime.utcnow()
+            # Generated here so both the insert and the fallback know the id
+            values = {
+                "id": generate_uuid(),
+                "error_type": error_type,
+                "error_message": error_message,
+                "stack_trace": stack_trace or "",
+                "signature_hash": signature_hash,
+                "occurrence_count": 1,
+                "first_seen": now,
+                "last_seen": now
+            }
+            
+            dialect = session.get_bind().dialect
+            dialect_insert = _UPSERT_INSERTS.get(dialect.name)
+            
+            if dialect_insert is not None and dialect.insert_returning:
+                # One statement: insert, or bump the existing signature
+                stmt = dialect_insert(ErrorSignature).values(**values)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=[ErrorSignature.signature_hash],
+                    set_={
+                        "occurrence_count": ErrorSignature.occurrence_count + 1,
+                        "last_seen": stmt.excluded.last_seen
+                    }
+                ).returning(ErrorSignature.id)
+                
+                error_id = session.execute(stmt).scalar_one()
+                logger.info(f"Recorded error signature: {signature_hash[:8]}")
+                return error_id
+            
             # Check if signature exists
             error_sig = session.query(ErrorSignature).filter_by(
                 signature_hash=signature_hash
@@ -111,20 +263,19 @@ class DebugContextManager:
             if error_sig:
                 # Update existing signature
                 error_sig.occurrence_count += 1
-                error_sig.last_seen = datetime.utcnow()
+                error_sig.last_seen = now
                 logger.info(f"Updated error signature (count: {error_sig.occurrence_count})")
             else:
                 # Create new signature
-                error_sig = ErrorSignature(
-                    error_type=error_type,
-                    error_message=error_message,
-                    stack_trace=stack_trace or "",
-                    signature_hash=signature_hash
-                )
+                error_sig = ErrorSignature(**values)
                 session.add(error_sig)
                 logger.info(f"Created new error signature: {signature_hash[:8]}")
             
             return error_sig.id
+        
+        error_id = await self._run_db(capture)
+        self._signature_hashes[error_id] = signature_hash
+        return error_id
     
     async def add_resolution(
         self,
@@ -143,8 +294,9 @@ class DebugContextManager:
         Returns:
             Resolution ID
         """
-        with self.db_manager.get_session() as session:
+        def add(session: SQLASession) -> str:
             resolution = Resolution(
+                id=generate_uuid(),
                 error_signature_id=error_signature_id,
                 resolution_type=resolution_type,
                 resolution_data=resolution_data
@@ -153,30 +305,97 @@ class DebugContextManager:
             
             logger.info(f"Added resolution for error {error_signature_id[:8]}")
             return resolution.id
+        
+        resolution_id = await self._run_db(add)
+        self._invalidate_hints(error_signature_id)
+        return resolution_id
     
     async def mark_resolution_success(self, resolution_id: str, success: bool = True) -> None:
         """
         Mark a resolution as successful or failed.
         
+        Outcomes are buffered and written in batches, so an outcome is not
+        durable until flush() has returned: the background flush after a
+        short delay does not survive the event loop shutting down. Hint
+        lookups through this manager flush first; callers must await flush()
+        once they are done recording outcomes and before shutdown.
+        
         Args:
             resolution_id: Resolution ID
             success: Whether the resolution worked
         """
-        with self.db_manager.get_session() as session:
-            resolution = session.query(Resolution).filter_by(id=resolution_id).first()
+        counts = self._pending_outcomes.get(resolution_id)
+        if counts is None:
+            counts = self._pending_outcomes[resolution_id] = [0, 0]
+        counts[0] += 1
+        counts[1] += 1 if success else 0
+        
+        if len(self._pending_outcomes) >= _OUTCOME_FLUSH_SIZE:
+            await self.flush()
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self) -> None:
+        """Flush buffered resolution outcomes after a short delay."""
+        await asyncio.sleep(_OUTCOME_FLUSH_DELAY)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to write resolution outcomes: {e}")
+    
+    async def flush(self) -> None:
+        """
+        Write all buffered resolution outcomes in one transaction.
+        
+        Waits for a write already in progress (e.g. from the flush timer),
+        so hints read afterwards see every outcome recorded before the call.
+        If the write fails, the counts are merged back into the buffer and
+        the error is raised.
+        """
+        async with self._flush_lock:
+            if not self._pending_outcomes:
+                return
             
-            if resolution:
-                resolution.applied_count += 1
-                if success:
-                    resolution.success_count += 1
-                
-                # Update success rate
-                resolution.success_rate = resolution.success_count / resolution.applied_count
-                
+            pending, self._pending_outcomes = self._pending_outcomes, {}
+            try:
+                await self._write_outcomes(pending)
+            except Exception:
+                for resolution_id, (applied, succeeded) in pending.items():
+                    counts = self._pending_outcomes.setdefault(resolution_id, [0, 0])
+                    counts[0] += applied
+                    counts[1] += succeeded
+                raise
+    
+    async def _write_outcomes(self, pending: Dict[str, List[int]]) -> None:
+        """Apply outcome counts and invalidate the affected hint entries."""
+        params = [
+            {"resolution_id": resolution_id, "applied": applied, "succeeded": succeeded}
+            for resolution_id, (applied, succeeded) in pending.items()
+        ]
+        
+        def write(session: SQLASession) -> List[str]:
+            session.execute(_outcome_update, params)
+            
+            rows = session.execute(
+                select(
+                    Resolution.id,
+                    Resolution.error_signature_id,
+                    Resolution.success_rate,
+                    Resolution.success_count,
+                    Resolution.applied_count
+                ).where(Resolution.id.in_(pending))
+            ).all()
+            
+            for resolution_id, _, success_rate, success_count, applied_count in rows:
                 logger.info(
                     f"Resolution {resolution_id[:8]} success rate: "
-                    f"{resolution.success_rate:.2%} ({resolution.success_count}/{resolution.applied_count})"
+                    f"{success_rate:.2%} ({success_count}/{applied_count})"
                 )
+            
+            return [row.error_signature_id for row in rows]
+        
+        for error_signature_id in await self._run_db(write):
+            self._invalidate_hints(error_signature_id)
     
     async def get_debug_hints(
         self,
@@ -195,15 +414,24 @@ class DebugContextManager:
         Returns:
             List of debug hints
         """
+        # Hints must reflect outcomes recorded so far
+        await self.flush()
+        
         error_type = type(error).__name__
         error_message = str(error)
         
         # Compute signature
         signature_hash = self._compute_error_signature(error_type, error_message, tool_name)
         
-        hints = []
+        cache_key = (signature_hash, min_confidence)
+        cached = self._hint_cache.get(cache_key)
+        if cached is not None and time.monotonic() < cached[0]:
+            self._hint_cache.move_to_end(cache_key)
+            return list(cached[1])
         
-        with self.db_manager.get_session() as session:
+        def load(session: SQLASession) -> Tuple[Optional[str], List[DebugHint]]:
+            hints = []
+            
             # Find matching error signature
             error_sig = session.query(ErrorSignature).filter_by(
                 signature_hash=signature_hash
@@ -211,7 +439,7 @@ class DebugContextManager:
             
             if not error_sig:
                 logger.info("No historical data for this error")
-                return hints
+                return None, hints
             
             # Get resolutions with success rate > threshold
             resolutions = session.query(Resolution).filter(
@@ -231,48 +459,41 @@ class DebugContextManager:
             if hints:
                 logger.info(f"Found {len(hints)} debug hints for error")
             
-        return hints
+            return error_sig.id, hints
+        
+        error_signature_id, hints = await self._run_db(load)
+        
+        if error_signature_id is not None:
+            self._signature_hashes[error_signature_id] = signature_hash
+        self._hint_cache[cache_key] = (time.monotonic() + _HINT_CACHE_TTL, hints)
+        self._hint_cache.move_to_end(cache_key)
+        if len(self._hint_cache) > _HINT_CACHE_SIZE:
+            self._hint_cache.popitem(last=False)
+        
+        return list(hints)
     
     def _generate_suggestion(self, resolution: Resolution) -> str:
         """Generate human-readable suggestion from resolution."""
         res_type = resolution.resolution_type
-        data = resolution.resolution_data
-        
-        if res_type == "parameter_change":
-            param = data.get("parameter")
-            value = data.get("new_value")
-            return f"Try changing parameter '{param}' to {value}"
-        
-        elif res_type == "dependency_fix":
-            dep = data.get("dependency")
-            return f"Install or update dependency: {dep}"
-        
-        elif res_type == "input_modification":
-            field = data.get("field")
-            suggestion = data.get("suggestion")
-            return f"Modify input field '{field}': {suggestion}"
-        
-        else:
+        formatter = _SUGGESTION_FORMATTERS.get(res_type)
+        if formatter is None:
             return f"Apply {res_type} resolution"
+        return formatter(resolution.resolution_data)
     
     async def get_system_stats(self) -> Dict[str, Any]:
         """Get debug system statistics."""
-        with self.db_manager.get_session() as session:
-            total_errors = session.query(ErrorSignature).count()
-            total_resolutions = session.query(Resolution).count()
-            
-            # Get error types distribution
-            from sqlalchemy import func
-            error_types = session.query(
-                ErrorSignature.error_type,
-                func.count(ErrorSignature.id)
-            ).group_by(ErrorSignature.error_type).all()
+        def load_stats(session: SQLASession) -> Dict[str, Any]:
+            rows = session.execute(_stats_select).all()
             
+            error_types = {et: count for et, count, _ in rows}
             return {
-                "total_unique_errors": total_errors,
-                "total_resolutions": total_resolutions,
-                "error_types": {et: count for et, count in error_types}
+                "total_unique_errors": sum(error_types.values()),
+                # Every resolution belongs to a signature, so no rows means none
+                "total_resolutions": rows[0][2] if rows else 0,
+                "error_types": error_types
             }
+        
+        return await self._run_db(load_stats)
 
 
 # Global instance
@@ -1,17 +1,29 @@
 """MCP Gateway - HTTP-SSE server implementing MCP protocol."""
 
 import asyncio
-import json
-from typing import Dict, Any, List
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+import importlib.util
+import logging
+import uuid
+from typing import Dict, Any, List, Optional
+from fastapi import FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from sqlalchemy import select
 import structlog
 
+from mcp_framework.server.debug_manager import get_debug_manager
 from mcp_framework.server.tool_registry import get_tool_registry
 from mcp_framework.server.workflow_executor import WorkflowExecutor
-from mcp_framework.storage.database import init_database
+from mcp_framework.storage.database import get_db_manager, init_database
+from mcp_framework.storage.models import WorkflowExecution
+from mcp_framework.tools.base import ToolCategory
+from mcp_framework.user_side.session_manager import get_session_manager
 from mcp_framework.config import settings
+from mcp_framework.serialization import (
+    MSGPACK_AVAILABLE, MSGPACK_STREAM_MEDIA_TYPE, json_dumps_bytes, msgpack_frame
+)
 
 # Initialize logger
 logger = structlog.get_logger()
@@ -23,6 +35,29 @@ app = FastAPI(title="MCP Framework Gateway", version="0.1.0")
 tool_registry = get_tool_registry()
 workflow_executor = WorkflowExecutor()
 
+# Read-only status lookup: select just the needed columns instead of loading
+# a mapped object into the session
+_workflow_status_select = select(
+    WorkflowExecution.id,
+    WorkflowExecution.status,
+    WorkflowExecution.progress,
+    WorkflowExecution.created_at,
+    WorkflowExecution.started_at,
+    WorkflowExecution.completed_at,
+    WorkflowExecution.error_message,
+    WorkflowExecution.results
+)
+
+
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def _sse_frame(event: Dict[str, Any]) -> bytes:
+    """Encode an event as an SSE data frame."""
+    # join sizes the frame once instead of building an intermediate bytes
+    return b"".join((_SSE_PREFIX, json_dumps_bytes(event), _SSE_SUFFIX))
+
 
 class MCPRequest(BaseModel):
     """MCP protocol request."""
@@ -42,20 +77,69 @@ class ToolCallRequest(BaseModel):
     arguments: Dict[str, Any]
 
 
+class BatchCallRequest(BaseModel):
+    """Batch tool call request."""
+    calls: List[ToolCallRequest]
+    max_concurrent: int = 8
+    stop_on_error: bool = False
+
+
 class WorkflowRequest(BaseModel):
     """Workflow execution request."""
     dag: Dict[str, Any]
     user_id: str = "anonymous"
 
 
+# Hot endpoints validate the raw request body directly in pydantic-core,
+# skipping FastAPI's separate JSON decode and dict validation pass
+_tool_call_adapter = TypeAdapter(ToolCallRequest)
+_batch_call_adapter = TypeAdapter(BatchCallRequest)
+_workflow_adapter = TypeAdapter(WorkflowRequest)
+
+
+async def _parse_body(request: Request, adapter: TypeAdapter) -> Any:
+    """Validate a JSON request body, reporting errors like FastAPI does."""
+    try:
+        return adapter.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError([
+            {**error, "loc": ("body", *error["loc"])}
+            for error in e.errors(include_url=False)
+        ])
+
+
+def _json_response(data: Any) -> Response:
+    """Serialize a response body with the shared JSON encoder."""
+    try:
+        body = json_dumps_bytes(data)
+    except TypeError:
+        # Tool results outside plain JSON types: convert like FastAPI would
+        body = json_dumps_bytes(jsonable_encoder(data))
+    return Response(content=body, media_type="application/json")
+
+
 @app.on_event("startup")
 async def startup():
     """Initialize on startup."""
     logger.info("Starting MCP Gateway")
+    
+    # Python 3.12+: new tasks run inline until they first suspend, so
+    # workflow nodes and tool calls that finish synchronously (cache hits,
+    # lightweight tools) skip a trip through the event loop's ready queue
+    if hasattr(asyncio, "eager_task_factory"):
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+    
     init_database()
     logger.info(f"Registered {len(tool_registry.list_tools())} tools")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    """Write buffered session events and resolution outcomes before exit."""
+    await get_session_manager().flush()
+    await get_debug_manager().flush()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -63,37 +147,29 @@ async def health_check():
 
 
 @app.get("/mcp/tools")
-async def list_tools(category: str = None):
+async def list_tools(category: str = None, if_none_match: Optional[str] = Header(None)):
     """
     List available tools (MCP tools/list).
     
     Args:
         category: Optional category filter (UTILITY, TRAINING, ADMIN)
+        if_none_match: ETag from a previous response, for conditional GETs
     
     Returns:
         List of tool metadata
     """
     try:
-        from mcp_framework.tools.base import ToolCategory
-        
         cat_filter = ToolCategory(category) if category else None
-        tool_names = tool_registry.list_tools(category=cat_filter)
+        body, etag = tool_registry.get_listing_bytes(category=cat_filter)
         
-        tools = []
-        for name in tool_names:
-            metadata = tool_registry.get_metadata(name)
-            if metadata:
-                tools.append({
-                    "name": metadata.name,
-                    "description": metadata.description,
-                    "category": metadata.category.value,
-                    "inputSchema": metadata.input_schema,
-                    "outputSchema": metadata.output_schema,
-                    "requiresIsolation": metadata.requires_isolation,
-                    "dependencies": metadata.dependencies
-                })
+        if if_none_match == etag:
+            return Response(status_code=304, headers={"ETag": etag})
         
-        return {"tools": tools, "count": len(tools)}
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers={"ETag": etag}
+        )
     
     except Exception as e:
         logger.error(f"Error listing tools: {e}")
@@ -101,24 +177,63 @@ async def list_tools(category: str = None):
 
 
 @app.post("/mcp/call")
-async def call_tool(request: ToolCallRequest):
+async def call_tool(raw_request: Request):
     """
     Execute a single tool (MCP tools/call).
     
     Args:
-        request: Tool call request with name and arguments
+        raw_request: HTTP request whose body is a ToolCallRequest
     
     Returns:
         Tool execution result
     """
+    request = await _parse_body(raw_request, _tool_call_adapter)
+    return _json_response(await _execute_tool_call(request))
+
+
+@app.post("/mcp/batch")
+async def call_tools_batch(raw_request: Request):
+    """
+    Execute several tools in one round-trip.
+    
+    Calls run concurrently, at most max_concurrent at a time. With
+    stop_on_error, calls not yet started when one fails are reported as
+    SKIPPED.
+    
+    Args:
+        raw_request: HTTP request whose body is a BatchCallRequest
+    
+    Returns:
+        One result per call, in request order
+    """
+    request = await _parse_body(raw_request, _batch_call_adapter)
+    semaphore = asyncio.Semaphore(max(1, request.max_concurrent))
+    failed = asyncio.Event()
+    
+    async def run(call: ToolCallRequest) -> Dict[str, Any]:
+        async with semaphore:
+            if request.stop_on_error and failed.is_set():
+                return {"tool": call.name, "status": "SKIPPED"}
+            result = await _execute_tool_call(call)
+            if result["status"] == "FAILED":
+                failed.set()
+            return result
+    
+    results = await asyncio.gather(*(run(call) for call in request.calls))
+    return _json_response({"results": results, "count": len(results)})
+
+
+async def _execute_tool_call(request: ToolCallRequest) -> Dict[str, Any]:
+    """Execute one tool call, reporting errors as a FAILED result."""
     try:
-        tool_class = tool_registry.get_tool(request.name)
+        tool_instance = tool_registry.get_instance(request.name)
         
-        if tool_class is None:
+        if tool_instance is None:
             raise HTTPException(status_code=404, detail=f"Tool '{request.name}' not found")
         
+        tool_instance.validate_inputs(request.arguments)
+        
         # Execute tool
-        tool_instance = tool_class()
         result = await tool_instance.execute(request.arguments)
         
         return {
@@ -137,17 +252,26 @@ async def call_tool(request: ToolCallRequest):
 
 
 @app.post("/mcp/workflow")
-async def execute_workflow(request: WorkflowRequest):
+async def execute_workflow(raw_request: Request, encoding: str = "json"):
     """
     Execute a workflow DAG.
     
     Args:
-        request: Workflow execution request
+        raw_request: HTTP request whose body is a WorkflowRequest
+        encoding: Event encoding, "json" for SSE or "msgpack" for
+            length-prefixed MessagePack frames (SSE if msgpack is missing)
     
     Returns:
         StreamingResponse with execution progress
     """
+    request = await _parse_body(raw_request, _workflow_adapter)
+    
     try:
+        if encoding == "msgpack" and MSGPACK_AVAILABLE:
+            encode_event, media_type = msgpack_frame, MSGPACK_STREAM_MEDIA_TYPE
+        else:
+            encode_event, media_type = _sse_frame, "text/event-stream"
+        
         # Execute workflow with streaming
         async def event_stream():
             """Stream workflow execution events."""
@@ -156,21 +280,21 @@ async def execute_workflow(request: WorkflowRequest):
                     request.dag,
                     user_id=request.user_id
                 ):
-                    yield f"data: {json.dumps(event)}\n\n"
+                    yield encode_event(event)
                 
                 # Final completion event
-                yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+                yield encode_event({"type": "complete"})
             
             except Exception as e:
                 error_event = {
                     "type": "error",
                     "error": str(e)
                 }
-                yield f"data: {json.dumps(error_event)}\n\n"
+                yield encode_event(error_event)
         
         return StreamingResponse(
             event_stream(),
-            media_type="text/event-stream",
+            media_type=media_type,
             headers={
                 "Cache-Control": "no-cache",
                 "Connection": "keep-alive",
@@ -182,6 +306,55 @@ async def execute_workflow(request: WorkflowRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.websocket("/mcp/workflow/ws")
+async def execute_workflow_ws(websocket: WebSocket):
+    """
+    Execute a workflow DAG over a WebSocket.
+    
+    The client sends one WorkflowRequest JSON message; each progress event
+    comes back as one binary JSON message, without SSE text framing,
+    followed by a "complete" event.
+    
+    Args:
+        websocket: Client connection
+    """
+    await websocket.accept()
+    
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        logger.info("Workflow client disconnected before sending a request")
+        return
+    
+    try:
+        request = _workflow_adapter.validate_json(message.get("bytes") or message.get("text") or b"")
+    except ValidationError as e:
+        await websocket.close(code=1007, reason=str(e)[:120])
+        return
+    
+    try:
+        async for event in workflow_executor.execute_streaming(
+            request.dag,
+            user_id=request.user_id
+        ):
+            await websocket.send_bytes(json_dumps_bytes(event))
+        
+        # Final completion event
+        await websocket.send_bytes(json_dumps_bytes({"type": "complete"}))
+    
+    except WebSocketDisconnect:
+        logger.info("Workflow client disconnected")
+        return
+    
+    except Exception as e:
+        logger.error(f"Error streaming workflow: {e}")
+        await websocket.send_bytes(json_dumps_bytes({
+            "type": "error",
+            "error": str(e)
+        }))
+    
+    await websocket.close()
+
+
 @app.get("/mcp/status/{workflow_id}")
 async def get_workflow_status(workflow_id: str):
     """
@@ -194,27 +367,40 @@ async def get_workflow_status(workflow_id: str):
         Workflow status and progress
     """
     try:
-        from mcp_framework.storage.database import get_db_manager
-        from mcp_framework.storage.models import WorkflowExecution
+        # Ids are native UUID columns; anything else cannot match
+        try:
+            uuid.UUID(workflow_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Workflow not found")
         
         db_manager = get_db_manager()
         
-        with db_manager.get_session() as session:
-            workflow = session.query(WorkflowExecution).filter_by(id=workflow_id).first()
-            
-            if not workflow:
-                raise HTTPException(status_code=404, detail="Workflow not found")
+        stmt = _workflow_status_select.where(WorkflowExecution.id == workflow_id)
+        
+        if db_manager.supports_async:
+            async with db_manager.get_async_session() as session:
+                workflow = (await session.execute(stmt)).mappings().first()
+        else:
+            # Without an async driver, keep the blocking query off the event loop
+            def fetch():
+                with db_manager.get_session() as session:
+                    return session.execute(stmt).mappings().first()
             
-            return {
-                "workflow_id": workflow.id,
-                "status": workflow.status,
-                "progress": workflow.progress,
-                "created_at": workflow.created_at.isoformat(),
-                "started_at": workflow.started_at.isoformat() if workflow.started_at else None,
-                "completed_at": workflow.completed_at.isoformat() if workflow.completed_at else None,
-                "error": workflow.error_message,
-                "results": workflow.results
-            }
+            workflow = await asyncio.to_thread(fetch)
+        
+        if not workflow:
+            raise HTTPException(status_code=404, detail="Workflow not found")
+        
+        return {
+            "workflow_id": workflow["id"],
+            "status": workflow["status"],
+            "progress": workflow["progress"],
+            "created_at": workflow["created_at"].isoformat(),
+            "started_at": workflow["started_at"].isoformat() if workflow["started_at"] else None,
+            "completed_at": workflow["completed_at"].isoformat() if workflow["completed_at"] else None,
+            "error": workflow["error_message"],
+            "results": workflow["results"]
+        }
     
     except HTTPException:
         raise
@@ -227,10 +413,22 @@ def main():
     """Run the MCP Gateway server."""
     import uvicorn
     
+    # Drop log calls below the configured level before any event dict or
+    # rendering work happens
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(
+            logging.getLevelName(settings.log_level.upper())
+        )
+    )
+    
+    # Prefer the libuv event loop and C HTTP parser; both are optional
+    # (uvloop is not available on Windows)
     uvicorn.run(
         app,
         host=settings.host,
         port=settings.port,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "asyncio",
+        http="httptools" if importlib.util.find_spec("httptools") else "h11",
         log_level=settings.log_level.lower()
     )
 
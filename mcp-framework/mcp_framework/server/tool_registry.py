@@ -1,8 +1,10 @@
 """Tool registry for managing available tools."""
 
+import hashlib
 import threading
-from typing import Dict, Type, List, Optional
+from typing import Any, Dict, Type, List, Optional, Tuple
 
+from mcp_framework.serialization import json_dumps_bytes
 from mcp_framework.tools.base import BaseTool, ToolMetadata, ToolCategory
 
 
@@ -27,7 +29,10 @@ class ToolRegistry:
             return
         
         self._tools: Dict[str, Type[BaseTool]] = {}
+        self._singletons: Dict[str, BaseTool] = {}  # Shared stateless instances
         self._lock_tools = threading.Lock()
+        # Serialized tools/list responses per category filter, with ETags
+        self._listing_cache: Dict[Optional[ToolCategory], Tuple[bytes, str]] = {}
         self._initialized = True
     
     def register(self, tool_class: Type[BaseTool]) -> None:
@@ -42,10 +47,16 @@ class ToolRegistry:
         
         tool_name = tool_class.get_name()
         
+        # Compile the input schema up front so the first call does not pay for it
+        tool_class.get_input_validator()
+        
         with self._lock_tools:
             if tool_name in self._tools:
                 raise ValueError(f"Tool '{tool_name}' already registered")
             self._tools[tool_name] = tool_class
+            if tool_class.is_stateless():
+                self._singletons[tool_name] = tool_class()
+            self._listing_cache.clear()
             print(f"✓ Registered tool: {tool_name} ({tool_class.get_category().value})")
     
     def get_tool(self, name: str) -> Optional[Type[BaseTool]]:
@@ -53,6 +64,26 @@ class ToolRegistry:
         with self._lock_tools:
             return self._tools.get(name)
     
+    def get_instance(self, name: str) -> Optional[BaseTool]:
+        """
+        Get a tool instance to execute.
+        
+        Stateless tools share one instance; others (e.g. isolated training
+        tools) get a fresh instance per call.
+        
+        Args:
+            name: Tool name
+        
+        Returns:
+            Tool instance, or None if the tool is not registered
+        """
+        with self._lock_tools:
+            instance = self._singletons.get(name)
+            tool_class = self._tools.get(name)
+        if instance is not None:
+            return instance
+        return tool_class() if tool_class is not None else None
+    
     def list_tools(self, category: Optional[ToolCategory] = None) -> List[str]:
         """
         List tool names, optionally filtered by category.
@@ -82,6 +113,47 @@ class ToolRegistry:
         """Get metadata for all tools."""
         with self._lock_tools:
             return [cls.get_metadata() for cls in self._tools.values()]
+    
+    def get_listing_bytes(self, category: Optional[ToolCategory] = None) -> Tuple[bytes, str]:
+        """
+        Get the serialized MCP tools/list response.
+        
+        Tool metadata does not change at runtime, so the response is built
+        once per category filter and reused until another tool registers.
+        
+        Args:
+            category: Optional category filter
+        
+        Returns:
+            Tuple of (JSON body, ETag)
+        """
+        cached = self._listing_cache.get(category)
+        if cached is not None:
+            return cached
+        
+        tools = []
+        for name in self.list_tools(category=category):
+            metadata = self.get_metadata(name)
+            if metadata:
+                tools.append(self._metadata_to_dict(metadata))
+        
+        body = json_dumps_bytes({"tools": tools, "count": len(tools)})
+        cached = (body, f'"{hashlib.sha1(body).hexdigest()}"')
+        self._listing_cache[category] = cached
+        return cached
+    
+    @staticmethod
+    def _metadata_to_dict(metadata: ToolMetadata) -> Dict[str, Any]:
+        """Convert tool metadata to its MCP tools/list entry."""
+        return {
+            "name": metadata.name,
+            "description": metadata.description,
+            "category": metadata.category.value,
+            "inputSchema": metadata.input_schema,
+            "outputSchema": metadata.output_schema,
+            "requiresIsolation": metadata.requires_isolation,
+            "dependencies": metadata.dependencies
+        }
 
 
 # Global registry instance
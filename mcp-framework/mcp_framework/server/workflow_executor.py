@@ -1,17 +1,100 @@
 """Workflow executor for DAG execution."""
 
 import asyncio
-from typing import Dict, Any, AsyncGenerator, List, Set
+import functools
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Any, AsyncGenerator, List, Optional, Tuple
 from datetime import datetime
-import uuid
 
+from mcp_framework.serialization import json_dumps_bytes, json_loads
 from mcp_framework.server.tool_registry import get_tool_registry
 from mcp_framework.storage.database import get_db_manager
-from mcp_framework.storage.models import WorkflowExecution, ToolExecution
+from mcp_framework.storage.models import WorkflowExecution, ToolExecution, generate_uuid
 import structlog
 
 logger = structlog.get_logger()
 
+# Results of cacheable tools are reused for identical inputs for this long
+_RESULT_CACHE_TTL = 300.0
+_RESULT_CACHE_SIZE = 1024
+
+# RUNNING rows are written only for nodes still running after this many
+# seconds; quicker nodes get a single row in their final state
+_RUNNING_WRITE_DELAY = 0.05
+
+
+_NodeIds = Tuple[str, ...]
+_Edges = Tuple[Tuple[str, str], ...]
+
+
+def _dag_shape(dag: Dict[str, Any]) -> Tuple[_NodeIds, _Edges]:
+    """Get a hashable (node ids, edges) key of a DAG, in definition order."""
+    return (
+        tuple(node["id"] for node in dag.get("nodes", [])),
+        tuple((edge["from"], edge["to"]) for edge in dag.get("edges", []))
+    )
+
+
+def _build_graph(
+    node_ids: _NodeIds,
+    edges: _Edges
+) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+    """Build fresh in-degree and adjacency maps for a DAG shape."""
+    in_degree = {node_id: 0 for node_id in node_ids}
+    adjacency = {node_id: [] for node_id in node_ids}
+    
+    for from_node, to_node in edges:
+        adjacency[from_node].append(to_node)
+        in_degree[to_node] += 1
+    
+    return in_degree, adjacency
+
+
+# (source node id, output key, target input key)
+_InputMapping = Tuple[str, str, str]
+
+
+def _compile_input_mappings(node: Dict[str, Any]) -> List[_InputMapping]:
+    """Parse a node's "node.output" -> input mappings once per run."""
+    mappings = []
+    for source_key, target_key in node.get("input_mappings", {}).items():
+        if "." in source_key:
+            source_node_id, output_key = source_key.split(".", 1)
+            mappings.append((source_node_id, output_key, target_key))
+    return mappings
+
+
+@functools.lru_cache(maxsize=256)
+def _execution_batches(node_ids: _NodeIds, edges: _Edges) -> Tuple[_NodeIds, ...]:
+    """Sort a DAG shape into parallel batches; cached as workflows repeat shapes."""
+    in_degree, adjacency = _build_graph(node_ids, edges)
+    
+    # Get nodes with no dependencies
+    batches = []
+    current_batch = [node_id for node_id, degree in in_degree.items() if degree == 0]
+    sorted_count = 0
+    
+    while current_batch:
+        batches.append(tuple(current_batch))
+        sorted_count += len(current_batch)
+        next_batch = []
+        
+        for node_id in current_batch:
+            for neighbor in adjacency[node_id]:
+                in_degree[neighbor] -= 1
+                if in_degree[neighbor] == 0:
+                    next_batch.append(neighbor)
+        
+        current_batch = next_batch
+    
+    # Nodes on a cycle never reach in-degree 0 (errors are not cached)
+    if sorted_count < len(in_degree):
+        raise ValueError("Workflow DAG contains cycles")
+    
+    return tuple(batches)
+
 
 class WorkflowExecutor:
     """Executes workflow DAGs with dependency resolution."""
@@ -20,12 +103,15 @@ class WorkflowExecutor:
         """Initialize executor."""
         self.tool_registry = get_tool_registry()
         self.db_manager = get_db_manager()
+        # (tool name, canonical inputs JSON) -> (monotonic expiry, result)
+        self._result_cache: "OrderedDict[Tuple[str, str], Tuple[float, bytes]]" = OrderedDict()
     
     def _topological_sort(self, dag: Dict[str, Any]) -> List[List[str]]:
         """
         Perform topological sort to get execution batches.
         
-        Returns batches of nodes that can be executed in parallel.
+        Returns batches of nodes that can be executed in parallel. Results
+        are cached per DAG shape, so re-running a workflow skips the sort.
         
         Args:
             dag: Workflow DAG with nodes and edges
@@ -33,40 +119,7 @@ class WorkflowExecutor:
         Returns:
             List of batches (each batch can be executed in parallel)
         """
-        nodes = {node["id"]: node for node in dag.get("nodes", [])}
-        edges = dag.get("edges", [])
-        
-        # Build adjacency list and in-degree
-        in_degree = {node_id: 0 for node_id in nodes}
-        adjacency = {node_id: [] for node_id in nodes}
-        
-        for edge in edges:
-            from_node = edge["from"]
-            to_node = edge["to"]
-            adjacency[from_node].append(to_node)
-            in_degree[to_node] += 1
-        
-        # Get nodes with no dependencies
-        batches = []
-        current_batch = [node_id for node_id, degree in in_degree.items() if degree == 0]
-        
-        while current_batch:
-            batches.append(current_batch)
-            next_batch = []
-            
-            for node_id in current_batch:
-                for neighbor in adjacency[node_id]:
-                    in_degree[neighbor] -= 1
-                    if in_degree[neighbor] == 0:
-                        next_batch.append(neighbor)
-            
-            current_batch = next_batch
-        
-        # Check for cycles
-        if sum(in_degree.values()) > 0:
-            raise ValueError("Workflow DAG contains cycles")
-        
-        return batches
+        return [list(batch) for batch in _execution_batches(*_dag_shape(dag))]
     
     async def execute_streaming(
         self,
@@ -83,22 +136,27 @@ class WorkflowExecutor:
         Yields:
             Progress events
         """
-        workflow_id = str(uuid.uuid4())
+        workflow_id = generate_uuid()
         
-        # Create workflow execution record
-        with self.db_manager.get_session() as session:
-            workflow = WorkflowExecution(
-                id=workflow_id,
-                workflow_dag=dag,
-                status="RUNNING",
-                started_at=datetime.utcnow()
-            )
-            session.add(workflow)
+        # Create workflow execution record. The instance stays usable after
+        # the session closes (no expire on commit), so later status changes
+        # re-attach it and issue a plain UPDATE instead of re-querying.
+        workflow = WorkflowExecution(
+            id=workflow_id,
+            workflow_dag=dag,
+            status="RUNNING",
+            started_at=datetime.utcnow()
+        )
+        await self._save([workflow])
         
         try:
-            # Get execution order
-            batches = self._topological_sort(dag)
-            total_nodes = sum(len(batch) for batch in batches)
+            # Node lookup and graph shape are built once per run
+            nodes = {node["id"]: node for node in dag.get("nodes", [])}
+            shape = _dag_shape(dag)
+            input_plan = {node_id: _compile_input_mappings(node) for node_id, node in nodes.items()}
+            
+            # Validate up front so a cyclic DAG fails before any node runs
+            total_nodes = sum(len(batch) for batch in _execution_batches(*shape))
             completed_nodes = 0
             
             # Yield start event
@@ -111,21 +169,122 @@ class WorkflowExecutor:
             # Store intermediate results
             results = {}
             
-            # Execute batches
-            for batch_idx, batch in enumerate(batches):
-                # Execute batch in parallel
-                tasks = []
-                for node_id in batch:
-                    task = self._execute_node(workflow_id, node_id, dag, results)
-                    tasks.append(task)
-                
-                # Wait for batch completion
-                batch_results = await asyncio.gather(*tasks, return_exceptions=True)
+            # Each node starts as soon as its own dependencies complete,
+            # instead of waiting for the rest of its topological batch
+            in_degree, adjacency = _build_graph(*shape)
+            in_flight: Dict["asyncio.Future[Dict[str, Any]]", str] = {}
+            # Execution records of running nodes, kept to update in place;
+            # nodes served from the result cache have none
+            records: Dict[str, ToolExecution] = {}
+            # Records to write in the next step's transaction
+            writes: List[ToolExecution] = []
+            # node id -> monotonic start, for running nodes with no row yet
+            unwritten: Dict[str, float] = {}
+            
+            def start_nodes(node_ids: List[str]) -> None:
+                started = time.monotonic()
+                for node_id in node_ids:
+                    node = nodes[node_id]
+                    inputs = self._resolve_inputs(node, input_plan[node_id], results)
+                    cache_key = self._result_cache_key(node["tool"], inputs)
+                    cached = self._get_cached_result(cache_key) if cache_key else None
+                    record = ToolExecution(
+                        id=generate_uuid(),
+                        workflow_id=workflow_id,
+                        tool_name=node["tool"],
+                        inputs=inputs,
+                        status="RUNNING",
+                        started_at=datetime.utcnow()
+                    )
+                    
+                    if cached is not None:
+                        # Recorded as finished; completes on the next step. A
+                        # cache hit is a COMPLETED row with zero duration.
+                        logger.debug(f"Node {node_id} served from result cache")
+                        record.status = "COMPLETED"
+                        record.outputs = cached
+                        record.completed_at = record.started_at
+                        writes.append(record)
+                        task = asyncio.get_running_loop().create_future()
+                        task.set_result(cached)
+                    else:
+                        records[node_id] = record
+                        unwritten[node_id] = started
+                        task = asyncio.create_task(self._run_tool(node["tool"], inputs, cache_key))
+                    in_flight[task] = node_id
+            
+            async def write_step() -> None:
+                # One transaction per scheduling step. Finished records are
+                # always written; RUNNING rows only once overdue.
+                overdue = time.monotonic() - _RUNNING_WRITE_DELAY
+                for node_id, started in list(unwritten.items()):
+                    if started <= overdue:
+                        writes.append(records[node_id])
+                        del unwritten[node_id]
                 
-                for node_id, result in zip(batch, batch_results):
-                    if isinstance(result, Exception):
+                if writes:
+                    pending = writes[:]
+                    writes.clear()
+                    await self._save(pending)
+            
+            start_nodes([node_id for node_id, degree in in_degree.items() if degree == 0])
+            
+            try:
+                while in_flight:
+                    # Wake up without a completion when a RUNNING row is due
+                    timeout = None
+                    if unwritten:
+                        timeout = max(0.0, min(unwritten.values()) + _RUNNING_WRITE_DELAY - time.monotonic())
+                    done, _ = await asyncio.wait(in_flight, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                    
+                    events = []
+                    failure: Optional[Tuple[str, str]] = None
+                    ready = []
+                    
+                    for task in done:
+                        node_id = in_flight.pop(task)
+                        error = task.exception()
+                        result = None if error is not None else task.result()
+                        record = records.pop(node_id, None)
+                        if record is not None:
+                            # Inserted in its final state if no RUNNING row was written
+                            unwritten.pop(node_id, None)
+                            writes.append(self._close_record(record, result, error))
+                        
+                        if error is not None:
+                            if failure is None:
+                                failure = (node_id, str(error))
+                            continue
+                        
+                        # Store result
+                        results[node_id] = result
+                        completed_nodes += 1
+                        
+                        events.append({
+                            "type": "node_completed",
+                            "node_id": node_id,
+                            "progress": completed_nodes / total_nodes,
+                            "result": result
+                        })
+                        
+                        for neighbor in adjacency[node_id]:
+                            in_degree[neighbor] -= 1
+                            if in_degree[neighbor] == 0:
+                                ready.append(neighbor)
+                    
+                    if failure is None:
+                        start_nodes(ready)
+                    
+                    # Finished nodes are durable before their events go out
+                    await write_step()
+                    
+                    # Yield progress
+                    for event in events:
+                        yield event
+                    
+                    if failure is not None:
                         # Handle error
-                        error_msg = str(result)
+                        node_id, error_msg = failure
                         
                         yield {
                             "type": "node_failed",
@@ -133,36 +292,39 @@ class WorkflowExecutor:
                             "error": error_msg
                         }
                         
+                        # Let running nodes finish so their records are closed
+                        running = list(in_flight.items())
+                        in_flight.clear()
+                        outcomes = await asyncio.gather(*(task for task, _ in running), return_exceptions=True)
+                        
+                        for (_, running_id), outcome in zip(running, outcomes):
+                            record = records.pop(running_id, None)
+                            if record is None:
+                                continue
+                            if isinstance(outcome, BaseException):
+                                writes.append(self._close_record(record, None, outcome))
+                            else:
+                                writes.append(self._close_record(record, outcome, None))
+                        
                         # Update workflow as failed
-                        with self.db_manager.get_session() as session:
-                            workflow = session.query(WorkflowExecution).filter_by(id=workflow_id).first()
-                            if workflow:
-                                workflow.status = "FAILED"
-                                workflow.error_message = f"Node {node_id} failed: {error_msg}"
-                                workflow.completed_at = datetime.utcnow()
+                        workflow.status = "FAILED"
+                        workflow.error_message = f"Node {node_id} failed: {error_msg}"
+                        workflow.completed_at = datetime.utcnow()
+                        
+                        await self._save([*writes, workflow])
                         
                         return
-                    
-                    # Store result
-                    results[node_id] = result
-                    completed_nodes += 1
-                    
-                    # Yield progress
-                    yield {
-                        "type": "node_completed",
-                        "node_id": node_id,
-                        "progress": completed_nodes / total_nodes,
-                        "result": result
-                    }
+            finally:
+                # Consumer went away or the stream was cancelled mid-run
+                for task in in_flight:
+                    task.cancel()
             
             # Update workflow as completed
-            with self.db_manager.get_session() as session:
-                workflow = session.query(WorkflowExecution).filter_by(id=workflow_id).first()
-                if workflow:
-                    workflow.status = "COMPLETED"
-                    workflow.progress = 1.0
-                    workflow.completed_at = datetime.utcnow()
-                    workflow.results = results
+            workflow.status = "COMPLETED"
+            workflow.progress = 1.0
+            workflow.completed_at = datetime.utcnow()
+            workflow.results = results
+            await self._save([workflow])
             
             yield {
                 "type": "workflow_completed",
@@ -174,12 +336,10 @@ class WorkflowExecutor:
             logger.error(f"Workflow execution error: {e}")
             
             # Update workflow as failed
-            with self.db_manager.get_session() as session:
-                workflow = session.query(WorkflowExecution).filter_by(id=workflow_id).first()
-                if workflow:
-                    workflow.status = "FAILED"
-                    workflow.error_message = str(e)
-                    workflow.completed_at = datetime.utcnow()
+            workflow.status = "FAILED"
+            workflow.error_message = str(e)
+            workflow.completed_at = datetime.utcnow()
+            await self._save([workflow])
             
             yield {
                 "type": "workflow_failed",
@@ -187,71 +347,111 @@ class WorkflowExecutor:
                 "error": str(e)
             }
     
-    async def _execute_node(
+    async def _save(self, instances: List[Any]) -> None:
+        """
+        Add or update ORM instances in one transaction off the event loop.
+        
+        Uses the async engine when a driver for it is installed, otherwise
+        runs the blocking session on a worker thread.
+        
+        Args:
+            instances: New or detached instances to persist
+        """
+        if self.db_manager.supports_async:
+            async with self.db_manager.get_async_session() as session:
+                session.add_all(instances)
+            return
+        
+        def save() -> None:
+            with self.db_manager.get_session() as session:
+                session.add_all(instances)
+        
+        await asyncio.to_thread(save)
+    
+    def _resolve_inputs(
         self,
-        workflow_id: str,
-        node_id: str,
-        dag: Dict[str, Any],
+        node: Dict[str, Any],
+        mappings: List[_InputMapping],
         intermediate_results: Dict[str, Any]
     ) -> Dict[str, Any]:
-        """Execute a single node in the workflow."""
-        # Find node definition
-        node = next((n for n in dag["nodes"] if n["id"] == node_id), None)
-        if not node:
-            raise ValueError(f"Node {node_id} not found in DAG")
-        
-        tool_name = node["tool"]
-        inputs = node.get("inputs", {})
+        """Build a node's inputs, filling mapped values from upstream results."""
+        inputs = dict(node.get("inputs", {}))
         
         # Resolve inputs from intermediate results
-        input_mappings = node.get("input_mappings", {})
-        for source_key, target_key in input_mappings.items():
-            if "." in source_key:
-                source_node_id, output_key = source_key.split(".", 1)
-                if source_node_id in intermediate_results:
-                    source_result = intermediate_results[source_node_id]
-                    if output_key in source_result:
-                        inputs[target_key] = source_result[output_key]
+        for source_node_id, output_key, target_key in mappings:
+            try:
+                inputs[target_key] = intermediate_results[source_node_id][output_key]
+            except (KeyError, TypeError):
+                pass  # Not produced upstream; keep the static input
         
-        # Create tool execution record
-        tool_exec_id = str(uuid.uuid4())
-        with self.db_manager.get_session() as session:
-            tool_exec = ToolExecution(
-                id=tool_exec_id,
-                workflow_id=workflow_id,
-                tool_name=tool_name,
-                inputs=inputs,
-                status="RUNNING",
-                started_at=datetime.utcnow()
-            )
-            session.add(tool_exec)
+        return inputs
+    
+    async def _run_tool(
+        self,
+        tool_name: str,
+        inputs: Dict[str, Any],
+        cache_key: Optional[Tuple[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Execute a single node's tool, caching the result under cache_key."""
+        tool_instance = self.tool_registry.get_instance(tool_name)
+        if not tool_instance:
+            raise ValueError(f"Tool {tool_name} not found")
         
+        result = await tool_instance.execute(inputs)
+        if cache_key is not None:
+            self._cache_result(cache_key, result)
+        return result
+    
+    def _result_cache_key(self, tool_name: str, inputs: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        """Get the result cache key for a call, or None if it is not cacheable."""
+        tool_class = self.tool_registry.get_tool(tool_name)
+        if tool_class is None or not tool_class.is_cacheable():
+            return None
+        
+        # The canonical JSON itself is the key, so distinct inputs never collide
         try:
-            # Get tool and execute
-            tool_class = self.tool_registry.get_tool(tool_name)
-            if not tool_class:
-                raise ValueError(f"Tool {tool_name} not found")
-            
-            tool_instance = tool_class()
-            result = await tool_instance.execute(inputs)
-            
-            # Update tool execution as completed
-            with self.db_manager.get_session() as session:
-                tool_exec = session.query(ToolExecution).filter_by(id=tool_exec_id).first()
-                if tool_exec:
-                    tool_exec.status = "COMPLETED"
-                    tool_exec.outputs = result
-                    tool_exec.completed_at = datetime.utcnow()
-            
-            return result
+            return tool_name, json.dumps(inputs, sort_keys=True, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+    
+    def _get_cached_result(self, cache_key: Tuple[str, str]) -> Optional[Dict[str, Any]]:
+        """Get an unexpired cached result, decoded afresh so callers may modify it."""
+        cached = self._result_cache.get(cache_key)
+        if cached is None:
+            return None
         
-        except Exception as e:
-            # Update tool execution as failed
-            with self.db_manager.get_session() as session:
-                tool_exec = session.query(ToolExecution).filter_by(id=tool_exec_id).first()
-                if tool_exec:
-                    tool_exec.status = "FAILED"
-                    tool_exec.error_message = str(e)
-                    tool_exec.completed_at = datetime.utcnow()
-            
-            raise
+        if time.monotonic() >= cached[0]:
+            del self._result_cache[cache_key]
+            return None
+        
+        self._result_cache.move_to_end(cache_key)
+        return json_loads(cached[1])
+    
+    def _cache_result(self, cache_key: Tuple[str, str], result: Dict[str, Any]) -> None:
+        """Store a tool result, evicting the least recently used entry when full."""
+        # Stored serialized, so nested values are never shared with callers
+        try:
+            payload = json_dumps_bytes(result)
+        except (TypeError, ValueError):
+            return
+        
+        self._result_cache[cache_key] = (time.monotonic() + _RESULT_CACHE_TTL, payload)
+        self._result_cache.move_to_end(cache_key)
+        if len(self._result_cache) > _RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+    
+    @staticmethod
+    def _close_record(
+        record: ToolExecution,
+        result: Optional[Dict[str, Any]],
+        error: Optional[BaseException]
+    ) -> ToolExecution:
+        """Mark a node's execution record as completed or failed."""
+        if error is None:
+            record.status = "COMPLETED"
+            record.outputs = result
+        else:
+            record.status = "FAILED"
+            record.error_message = str(error)
+        record.completed_at = datetime.utcnow()
+        return record
@@ -1,14 +1,50 @@
 """Database connection and session management."""
 
-from sqlalchemy import create_engine
+import importlib.util
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, Session as SQLASession
-from contextlib import contextmanager
-from typing import Generator
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Optional
 
 from mcp_framework.config import settings
+from mcp_framework.serialization import json_dumps, json_loads
 from mcp_framework.storage.models import Base
 
 
+class _SessionContext:
+    """
+    Context manager for one session transaction.
+    
+    A plain class rather than @contextmanager: get_session() is entered for
+    every workflow step and status update, and this skips the generator
+    and wrapper objects that contextlib creates per call.
+    """
+    
+    __slots__ = ("_factory", "_session")
+    
+    def __init__(self, factory: sessionmaker):
+        self._factory = factory
+        self._session: Optional[SQLASession] = None
+    
+    def __enter__(self) -> SQLASession:
+        self._session = self._factory()
+        return self._session
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        session = self._session
+        try:
+            if exc_type is None:
+                session.commit()
+            elif issubclass(exc_type, Exception):
+                session.rollback()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
 class DatabaseManager:
     """Manages database connection and sessions."""
     
@@ -18,9 +54,66 @@ class DatabaseManager:
         self.engine = create_engine(
             self.database_url,
             pool_pre_ping=True,
-            echo=settings.log_level == "DEBUG"
+            echo=settings.log_level == "DEBUG",
+            **self._engine_options()
         )
+        self._configure_connections(self.engine)
         self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False)
+        
+        # Created on first use of get_async_session()
+        self.async_database_url = self._get_async_database_url()
+        self._async_engine = None
+        self._AsyncSessionLocal = None
+    
+    def _engine_options(self) -> Dict[str, Any]:
+        """Get engine options shared by the sync and async engines."""
+        return {
+            # JSON columns (context, event data, results) go through the
+            # shared encoder instead of stdlib json
+            "json_serializer": json_dumps,
+            "json_deserializer": json_loads,
+            **self._pool_options()
+        }
+    
+    def _configure_connections(self, engine: Any) -> None:
+        """Apply per-connection settings when the pool opens a connection."""
+        if engine.dialect.name != "sqlite":
+            return
+        
+        @event.listens_for(engine, "connect")
+        def _set_sqlite_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for pragma in _SQLITE_PRAGMAS:
+                    cursor.execute(pragma)
+            finally:
+                cursor.close()
+    
+    def _pool_options(self) -> Dict[str, Any]:
+        """Get bounded connection pool settings (SQLite keeps its default pool)."""
+        if make_url(self.database_url).get_backend_name() == "sqlite":
+            return {}
+        return {
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+            "pool_recycle": settings.db_pool_recycle,
+        }
+    
+    def _get_async_database_url(self) -> Optional[str]:
+        """Get the async-driver URL, or None if no async driver is installed."""
+        url = make_url(self.database_url)
+        driver = _ASYNC_DRIVERS.get(url.get_backend_name())
+        if driver is None:
+            return None
+        if importlib.util.find_spec(driver) is None or importlib.util.find_spec("greenlet") is None:
+            return None
+        return url.set(drivername=f"{url.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+    
+    @property
+    def supports_async(self) -> bool:
+        """Whether get_async_session() is available for this database."""
+        return self.async_database_url is not None
     
     def create_tables(self) -> None:
         """Create all tables."""
@@ -30,18 +123,60 @@ class DatabaseManager:
         """Drop all tables (use with caution)."""
         Base.metadata.drop_all(bind=self.engine)
     
-    @contextmanager
-    def get_session(self) -> Generator[SQLASession, None, None]:
+    def get_session(self) -> "_SessionContext":
         """Get database session with automatic commit/rollback."""
-        session = self.SessionLocal()
-        try:
-            yield session
-            session.commit()
-        except Exception:
-            session.rollback()
-            raise
-        finally:
-            session.close()
+        return _SessionContext(self.SessionLocal)
+    
+    @asynccontextmanager
+    async def get_async_session(self) -> AsyncGenerator[Any, None]:
+        """
+        Get an AsyncSession with automatic commit/rollback.
+        
+        Queries run without blocking the event loop. Check supports_async
+        first; tables are still created through the sync engine.
+        
+        Raises:
+            RuntimeError: If no async driver is installed for this database
+        """
+        if self._AsyncSessionLocal is None:
+            if not self.supports_async:
+                raise RuntimeError(f"No async driver available for {self.engine.dialect.name}")
+            
+            from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+            
+            self._async_engine = create_async_engine(
+                self.async_database_url,
+                pool_pre_ping=True,
+                echo=settings.log_level == "DEBUG",
+                **self._engine_options()
+            )
+            self._configure_connections(self._async_engine.sync_engine)
+            self._AsyncSessionLocal = async_sessionmaker(self._async_engine, expire_on_commit=False)
+        
+        async with self._AsyncSessionLocal() as session:
+            try:
+                yield session
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                raise
+
+
+# WAL lets readers run alongside a writer and, with synchronous=NORMAL,
+# syncs at checkpoints instead of on every commit
+_SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+)
+
+
+# Async driver per sync dialect; SQLAlchemy's asyncio support also needs greenlet
+_ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
 
 
 # Global database manager
@@ -1,17 +1,126 @@
 """Database models for MCP Framework."""
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, JSON, ForeignKey, Text
+from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, JSON, ForeignKey, Text, Uuid, Index
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.functions import FunctionElement
 from datetime import datetime
+import os
+import threading
 import uuid
 
 Base = declarative_base()
 
 
+# Native 16-byte UUID on PostgreSQL; elsewhere the hyphenated 36-character
+# string the ids were always stored as, so existing SQLite databases keep
+# matching. Either way ids round-trip as plain str in Python
+UUIDStr = String(36).with_variant(Uuid(as_uuid=False), "postgresql")
+
+# Binary JSONB on PostgreSQL (stored pre-parsed), plain JSON elsewhere
+JSONType = JSON().with_variant(JSONB(), "postgresql")
+
+
+class utcnow(FunctionElement):
+    """Current UTC time from the database clock, as a naive DATETIME."""
+    
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw) -> str:
+    # Most databases report CURRENT_TIMESTAMP in UTC
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "sqlite")
+def _utcnow_sqlite(element, compiler, **kw) -> str:
+    # CURRENT_TIMESTAMP has whole-second precision on SQLite, which would
+    # sort before Python-stamped values from the same second
+    return "STRFTIME('%Y-%m-%d %H:%M:%f', 'now')"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw) -> str:
+    # now() follows the connection's time zone; pin it to UTC like utcnow()
+    return "TIMEZONE('utc', CURRENT_TIMESTAMP)"
+
+
+class _ISOTimestampString(TypeDecorator):
+    """String result type that also accepts datetimes from unknown dialects."""
+    
+    impl = String
+    cache_ok = True
+    
+    def process_result_value(self, value, dialect):
+        if isinstance(value, datetime):
+            return value.isoformat(timespec="milliseconds")
+        return value
+
+
+class iso_timestamp(FunctionElement):
+    """
+    A DATETIME expression returned as an ISO 8601 string by the database.
+    
+    Every backend produces the same fixed-width "YYYY-MM-DDTHH:MM:SS.mmm"
+    form, i.e. datetime.isoformat(timespec="milliseconds"); SQLite cannot
+    format finer than milliseconds, so that is the common precision.
+    """
+    
+    type = _ISOTimestampString()
+    inherit_cache = True
+
+
+@compiles(iso_timestamp)
+def _iso_timestamp_default(element, compiler, **kw) -> str:
+    # Select the value as is; the result type formats it in Python
+    return compiler.process(element.clauses, **kw)
+
+
+@compiles(iso_timestamp, "sqlite")
+def _iso_timestamp_sqlite(element, compiler, **kw) -> str:
+    # %f is seconds with exactly three decimals, whatever precision was stored
+    return f"strftime('%Y-%m-%dT%H:%M:%f', {compiler.process(element.clauses, **kw)})"
+
+
+@compiles(iso_timestamp, "postgresql")
+def _iso_timestamp_postgresql(element, compiler, **kw) -> str:
+    return f"""to_char({compiler.process(element.clauses, **kw)}, 'YYYY-MM-DD"T"HH24:MI:SS.MS')"""
+
+
+# Random bytes for generate_uuid, fetched 256 UUIDs at a time so inserts do
+# not each pay an os.urandom syscall
+_UUID_BATCH = 256
+_uuid_lock = threading.Lock()
+_uuid_buffer = b""
+_uuid_pos = 0
+
+
+def _reset_uuid_buffer() -> None:
+    """Drop buffered random bytes (a forked child must not reuse the parent's)."""
+    global _uuid_buffer, _uuid_pos
+    _uuid_buffer = b""
+    _uuid_pos = 0
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_uuid_buffer)
+
+
 def generate_uuid() -> str:
-    """Generate UUID string."""
-    return str(uuid.uuid4())
+    """Generate a random (version 4) UUID string."""
+    global _uuid_buffer, _uuid_pos
+    with _uuid_lock:
+        if _uuid_pos >= len(_uuid_buffer):
+            _uuid_buffer = os.urandom(16 * _UUID_BATCH)
+            _uuid_pos = 0
+        raw = _uuid_buffer[_uuid_pos:_uuid_pos + 16]
+        _uuid_pos += 16
+    return str(uuid.UUID(bytes=raw, version=4))
 
 
 class Session(Base):
@@ -19,12 +128,12 @@ class Session(Base):
     
     __tablename__ = "sessions"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(UUIDStr, primary_key=True, default=generate_uuid)
     user_id = Column(String, nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    context = Column(JSON, default=dict)
-    preferences = Column(JSON, default=dict)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=utcnow())
+    context = Column(JSONType, default=dict)
+    preferences = Column(JSONType, default=dict)
     is_active = Column(Boolean, default=True)
     
     # Relationships
@@ -35,11 +144,15 @@ class SessionEvent(Base):
     """Session event log."""
     
     __tablename__ = "session_events"
+    __table_args__ = (
+        # History reads filter by session and sort by time
+        Index("ix_se_session_ts", "session_id", "timestamp"),
+    )
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    session_id = Column(String, ForeignKey("sessions.id"), nullable=False, index=True)
+    id = Column(UUIDStr, primary_key=True, default=generate_uuid)
+    session_id = Column(UUIDStr, ForeignKey("sessions.id"), nullable=False)
     event_type = Column(String, nullable=False)
-    event_data = Column(JSON, default=dict)
+    event_data = Column(JSONType, default=dict)
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
     
     # Relationships
@@ -51,13 +164,13 @@ class ErrorSignature(Base):
     
     __tablename__ = "error_signatures"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
+    id = Column(UUIDStr, primary_key=True, default=generate_uuid)
     error_type = Column(String, nullable=False)
     error_message = Column(Text, nullable=False)
     stack_trace = Column(Text)
-    signature_hash = Column(String, unique=True, nullable=False, index=True)
+    signature_hash = Column(String(32), unique=True, nullable=False, index=True)  # 128-bit hex digest
     first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
-    last_seen = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_seen = Column(DateTime, default=datetime.utcnow, onupdate=utcnow())
     occurrence_count = Column(Integer, default=1)
     
     # Relationships
@@ -68,11 +181,16 @@ class Resolution(Base):
     """Resolution for an error signature."""
     
     __tablename__ = "resolutions"
-    
-    id = Column(String, primary_key=True, default=generate_uuid)
-    error_signature_id = Column(String, ForeignKey("error_signatures.id"), nullable=False, index=True)
+    __table_args__ = (
+        # Debug hints filter by signature and read best success rate first
+        # (scanned backwards); also serves lookups by signature alone
+        Index("ix_res_sig_rate", "error_signature_id", "success_rate"),
+    )
+    
+    id = Column(UUIDStr, primary_key=True, default=generate_uuid)
+    error_signature_id = Column(UUIDStr, ForeignKey("error_signatures.id"), nullable=False)
     resolution_type = Column(String, nullable=False)
-    resolution_data = Column(JSON, nullable=False)
+    resolution_data = Column(JSONType, nullable=False)
     success_rate = Column(Float, default=0.0)
     applied_count = Column(Integer, default=0)
     success_count = Column(Integer, default=0)
@@ -87,16 +205,16 @@ class WorkflowExecution(Base):
     
     __tablename__ = "workflow_executions"
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    session_id = Column(String, ForeignKey("sessions.id"), nullable=True, index=True)
-    workflow_dag = Column(JSON, nullable=False)
+    id = Column(UUIDStr, primary_key=True, default=generate_uuid)
+    session_id = Column(UUIDStr, ForeignKey("sessions.id"), nullable=True, index=True)
+    workflow_dag = Column(JSONType, nullable=False)
     status = Column(String, default="PENDING", nullable=False)  # PENDING, RUNNING, COMPLETED, FAILED
     progress = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     started_at = Column(DateTime)
     completed_at = Column(DateTime)
     error_message = Column(Text)
-    results = Column(JSON, default=dict)
+    results = Column(JSONType, default=dict)
     
     # Relationships
     tool_executions = relationship("ToolExecution", back_populates="workflow", cascade="all, delete-orphan")
@@ -106,12 +224,16 @@ class ToolExecution(Base):
     """Individual tool execution within a workflow."""
     
     __tablename__ = "tool_executions"
+    __table_args__ = (
+        # Serves lookups by workflow_id alone as well as per-status counts
+        Index("ix_te_wf_status", "workflow_id", "status"),
+    )
     
-    id = Column(String, primary_key=True, default=generate_uuid)
-    workflow_id = Column(String, ForeignKey("workflow_executions.id"), nullable=False, index=True)
+    id = Column(UUIDStr, primary_key=True, default=generate_uuid)
+    workflow_id = Column(UUIDStr, ForeignKey("workflow_executions.id"), nullable=False)
     tool_name = Column(String, nullable=False)
-    inputs = Column(JSON, nullable=False)
-    outputs = Column(JSON, default=dict)
+    inputs = Column(JSONType, nullable=False)
+    outputs = Column(JSONType, default=dict)
     status = Column(String, default="PENDING", nullable=False)
     progress = Column(Float, default=0.0)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -1,10 +1,15 @@
 """Base tool interface for MCP Framework."""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from enum import Enum
 from pydantic import BaseModel, Field
 
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
 
 class ToolCategory(str, Enum):
     """Tool category classification."""
@@ -64,6 +69,16 @@ class BaseTool(ABC):
         """Get JSON Schema for outputs."""
         pass
     
+    @classmethod
+    def is_stateless(cls) -> bool:
+        """Whether one instance can safely serve every call."""
+        return not cls.requires_isolation()
+    
+    @classmethod
+    def is_cacheable(cls) -> bool:
+        """Whether a result can be reused for later calls with identical inputs."""
+        return False
+    
     @classmethod
     def get_dependencies(cls) -> List[str]:
         """Get list of dependent tool names."""
@@ -71,8 +86,18 @@ class BaseTool(ABC):
     
     @classmethod
     def get_metadata(cls) -> ToolMetadata:
-        """Get complete tool metadata."""
-        return ToolMetadata(
+        """
+        Get complete tool metadata.
+        
+        Metadata is a pure function of the class, so it is built once and
+        cached on the class itself (not inherited by subclasses). Treat the
+        result as read-only.
+        """
+        cached = cls.__dict__.get("_metadata_cache")
+        if cached is not None:
+            return cached
+        
+        metadata = ToolMetadata(
             name=cls.get_name(),
             description=cls.get_description(),
             category=cls.get_category(),
@@ -81,6 +106,45 @@ class BaseTool(ABC):
             requires_isolation=cls.requires_isolation(),
             dependencies=cls.get_dependencies()
         )
+        cls._metadata_cache = metadata
+        return metadata
+    
+    @classmethod
+    def get_input_validator(cls) -> Optional[Callable[[Dict[str, Any]], Any]]:
+        """
+        Get the compiled validator for the input schema.
+        
+        Compiled once per class and cached like the metadata. Returns None
+        when fastjsonschema is not installed.
+        """
+        if fastjsonschema is None:
+            return None
+        
+        validator = cls.__dict__.get("_input_validator")
+        if validator is None:
+            validator = fastjsonschema.compile(cls.get_input_schema())
+            cls._input_validator = validator
+        return validator
+    
+    @classmethod
+    def validate_inputs(cls, inputs: Dict[str, Any]) -> None:
+        """
+        Validate inputs against the tool's input schema.
+        
+        Args:
+            inputs: Tool inputs
+        
+        Raises:
+            ValueError: If the inputs do not match the schema
+        """
+        validator = cls.get_input_validator()
+        if validator is None:
+            return
+        
+        try:
+            validator(inputs)
+        except fastjsonschema.JsonSchemaException as e:
+            raise ValueError(f"Invalid arguments for '{cls.get_name()}': {e.message}") from e
     
     @abstractmethod
     async def execute(self, inputs: Dict[str, Any], runtime: Optional[Any] = None) -> Dict[str, Any]:
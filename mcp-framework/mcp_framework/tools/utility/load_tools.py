@@ -23,6 +23,10 @@ class LoadDatasetTool(BaseTool):
     def get_category(cls) -> ToolCategory:
         return ToolCategory.UTILITY
     
+    @classmethod
+    def is_cacheable(cls) -> bool:
+        return True
+    
     @classmethod
     def get_input_schema(cls) -> Dict[str, Any]:
         return {
@@ -75,6 +79,10 @@ class LoadConfigTool(BaseTool):
     def get_category(cls) -> ToolCategory:
         return ToolCategory.UTILITY
     
+    @classmethod
+    def is_cacheable(cls) -> bool:
+        return True
+    
     @classmethod
     def get_input_schema(cls) -> Dict[str, Any]:
         return {
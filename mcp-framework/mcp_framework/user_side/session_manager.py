@@ -1,23 +1,170 @@
 """User Session Manager - Maintains conversation context."""
 
-from typing import Dict, Any, Optional, List
-from datetime import datetime
-import uuid
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Any, NamedTuple, Optional, List, Tuple, TypeVar
+
+from sqlalchemy import bindparam, func, insert, literal_column, select, update
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session as SQLASession
 
 from mcp_framework.storage.database import get_db_manager
-from mcp_framework.storage.models import Session, SessionEvent
+from mcp_framework.storage.models import Session, SessionEvent, generate_uuid, iso_timestamp
 import structlog
 
 logger = structlog.get_logger()
 
+# How long a session confirmed active in the database is trusted without
+# re-checking; bounds how stale the view of a session closed elsewhere can be
+_VERIFY_TTL = 30.0
+
+# Buffered session events are written once this many are pending, or after
+# this delay, whichever comes first
+_EVENT_FLUSH_SIZE = 64
+_EVENT_FLUSH_DELAY = 0.1
+
+# Context and preference reads are served from memory for this long; writes
+# through this manager invalidate them immediately
+_READ_CACHE_TTL = 2.0
+_READ_CACHE_MAX = 1024
+
+# get_or_create_session is serialized per user through one of this many
+# locks (a power of two), so users only wait on others sharing their shard
+_SESSION_LOCK_SHARDS = 16
+
+T = TypeVar("T")
+
+
+class HistoryEvent(NamedTuple):
+    """One session history entry; use _asdict() where a dict is needed."""
+    type: str
+    data: Dict[str, Any]
+    timestamp: str  # ISO 8601 with milliseconds, e.g. "2024-01-01T12:00:00.000"
+
 
 class SessionContextManager:
     """Manages user session context and history."""
     
+    __slots__ = (
+        "db_manager",
+        "active_sessions",
+        "_verified_until",
+        "_event_buffer",
+        "_flush_timer",
+        "_flush_lock",
+        "_last_event_time",
+        "_context_cache",
+        "_preferences_cache",
+        "_session_locks",
+    )
+    
     def __init__(self):
         """Initialize session manager."""
         self.db_manager = get_db_manager()
         self.active_sessions: Dict[str, str] = {}  # user_id -> session_id
+        self._verified_until: Dict[str, float] = {}  # session_id -> monotonic expiry
+        self._event_buffer: List[Dict[str, Any]] = []  # Rows pending insert
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()  # Held while a batch is being written
+        self._last_event_time: Optional[datetime] = None  # Latest timestamp handed out
+        # session_id -> (monotonic expiry, value)
+        self._context_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._preferences_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._session_locks = [asyncio.Lock() for _ in range(_SESSION_LOCK_SHARDS)]
+    
+    async def _run_db(self, work: Callable[[SQLASession], T]) -> T:
+        """
+        Run database work in one transaction on a worker thread.
+        
+        The ORM driver is synchronous, so this keeps queries from blocking
+        the event loop; connections come from the engine's bounded pool.
+        
+        Args:
+            work: Function receiving the session; must return plain values
+        
+        Returns:
+            The function's result
+        """
+        def run() -> T:
+            with self.db_manager.get_session() as db_session:
+                return work(db_session)
+        
+        return await asyncio.to_thread(run)
+    
+    async def _merge_json(
+        self,
+        column: Any,
+        session_id: str,
+        updates: Dict[str, Any]
+    ) -> None:
+        """
+        Shallow-merge updates into a session's JSON column.
+        
+        PostgreSQL merges in a single UPDATE with the JSONB || operator, so
+        concurrent merges never overwrite each other. Other databases read
+        the current value under a row lock and write back a new dict.
+        
+        Args:
+            column: Session JSON column to merge into
+            session_id: Session ID
+            updates: Keys to add or replace
+        """
+        def merge(db_session: SQLASession) -> None:
+            where = Session.id == session_id
+            
+            if db_session.get_bind().dialect.name == "postgresql":
+                patch = bindparam("patch", updates, type_=JSONB)
+                merged = func.coalesce(column, literal_column("'{}'::jsonb")).op("||")(patch)
+            else:
+                row = db_session.execute(
+                    select(column).where(where).with_for_update()
+                ).first()
+                if row is None:
+                    return
+                merged = {**(row[0] or {}), **updates}
+            
+            db_session.execute(update(Session).where(where).values({column: merged}))
+        
+        await self._run_db(merge)
+    
+    async def _get_json(
+        self,
+        column: Any,
+        cache: Dict[str, Tuple[float, Dict[str, Any]]],
+        session_id: str
+    ) -> Dict[str, Any]:
+        """
+        Read a session's JSON column through a short-lived cache.
+        
+        Args:
+            column: Session JSON column to read
+            cache: Cache for that column
+            session_id: Session ID
+        
+        Returns:
+            A copy of the stored dict ({} if the session does not exist)
+        """
+        cached = cache.get(session_id)
+        if cached is not None and time.monotonic() < cached[0]:
+            return dict(cached[1])
+        
+        def load(db_session: SQLASession) -> Dict[str, Any]:
+            value = db_session.execute(
+                select(column).where(Session.id == session_id)
+            ).scalar_one_or_none()
+            return value or {}
+        
+        value = await self._run_db(load)
+        
+        now = time.monotonic()
+        if len(cache) >= _READ_CACHE_MAX:
+            # Drop expired entries so sessions that are never closed do not
+            # accumulate
+            for key in [key for key, (expires, _) in cache.items() if expires <= now]:
+                del cache[key]
+        cache[session_id] = (now + _READ_CACHE_TTL, value)
+        return dict(value)
     
     async def create_session(self, user_id: str, initial_context: Dict[str, Any] = None) -> str:
         """
@@ -30,41 +177,57 @@ class SessionContextManager:
         Returns:
             Session ID
         """
-        session_id = str(uuid.uuid4())
+        session_id = generate_uuid()
         
-        with self.db_manager.get_session() as db_session:
-            session = Session(
+        # Write-only path: a Core INSERT skips building an ORM instance and
+        # the unit-of-work flush; column defaults still apply
+        def create(db_session: SQLASession) -> None:
+            db_session.execute(insert(Session).values(
                 id=session_id,
                 user_id=user_id,
                 context=initial_context or {},
                 is_active=True
-            )
-            db_session.add(session)
+            ))
+        
+        await self._run_db(create)
         
         # Track active session
         self.active_sessions[user_id] = session_id
+        self._verified_until[session_id] = time.monotonic() + _VERIFY_TTL
         
-        logger.info(f"Created session {session_id[:8]} for user {user_id}")
+        logger.info("session_created", session_id=session_id, user_id=user_id)
         return session_id
     
     async def get_or_create_session(self, user_id: str) -> str:
         """Get active session or create new one."""
-        # Check if user has active session
-        if user_id in self.active_sessions:
-            session_id = self.active_sessions[user_id]
-            
-            # Verify session still exists and is active
-            with self.db_manager.get_session() as db_session:
-                session = db_session.query(Session).filter_by(
-                    id=session_id,
-                    is_active=True
-                ).first()
+        # Without the lock, concurrent first calls for a user would each
+        # create a session
+        async with self._session_locks[hash(user_id) & (_SESSION_LOCK_SHARDS - 1)]:
+            # Check if user has active session
+            if user_id in self.active_sessions:
+                session_id = self.active_sessions[user_id]
                 
-                if session:
+                # Recently verified sessions skip the database round-trip
+                if time.monotonic() < self._verified_until.get(session_id, 0.0):
                     return session_id
-        
-        # Create new session
-        return await self.create_session(user_id)
+                
+                # Verify session still exists and is active
+                def is_active(db_session: SQLASession) -> bool:
+                    return db_session.execute(
+                        select(Session.id).where(
+                            Session.id == session_id,
+                            Session.is_active.is_(True)
+                        )
+                    ).scalar_one_or_none() is not None
+                
+                if await self._run_db(is_active):
+                    self._verified_until[session_id] = time.monotonic() + _VERIFY_TTL
+                    return session_id
+                
+                self._verified_until.pop(session_id, None)
+            
+            # Create new session
+            return await self.create_session(user_id)
     
     async def add_event(
         self,
@@ -75,20 +238,95 @@ class SessionContextManager:
         """
         Add an event to session history.
         
+        Events are buffered and inserted in batches, so an event is not
+        durable until flush() has returned: the background flush after a
+        short delay does not survive the event loop shutting down. Reads
+        through this manager flush first; callers must await flush() at the
+        end of a unit of work and before shutdown.
+        
         Args:
             session_id: Session ID
             event_type: Type of event (e.g., "user_message", "tool_call", "workflow_start")
             event_data: Event payload
         """
-        with self.db_manager.get_session() as db_session:
-            event = SessionEvent(
-                session_id=session_id,
-                event_type=event_type,
-                event_data=event_data
-            )
-            db_session.add(event)
+        await self.add_events(session_id, [(event_type, event_data)])
+    
+    async def add_events(
+        self,
+        session_id: str,
+        events: List[Tuple[str, Dict[str, Any]]]
+    ) -> None:
+        """
+        Add several events to session history.
+        
+        Buffered like add_event; not durable until flush() has returned.
+        
+        Args:
+            session_id: Session ID
+            events: (event_type, event_data) pairs in chronological order
+        """
+        if not events:
+            return
+        
+        # Timestamp now, so history order does not depend on when the
+        # buffer is written
+        for event_type, event_data in events:
+            self._event_buffer.append({
+                "id": generate_uuid(),
+                "session_id": session_id,
+                "event_type": event_type,
+                "event_data": event_data,
+                "timestamp": self._next_event_time()
+            })
+        
+        logger.debug("session_events_added", session_id=session_id, count=len(events))
         
-        logger.debug(f"Added {event_type} event to session {session_id[:8]}")
+        if len(self._event_buffer) >= _EVENT_FLUSH_SIZE:
+            await self.flush()
+        elif self._flush_timer is None or self._flush_timer.done():
+            self._flush_timer = asyncio.create_task(self._flush_later())
+    
+    def _next_event_time(self) -> datetime:
+        """
+        Get a naive UTC timestamp for a new event.
+        
+        Strictly increasing, so events added within the same clock tick
+        still sort in the order they were added.
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        if self._last_event_time is not None and now <= self._last_event_time:
+            now = self._last_event_time + timedelta(microseconds=1)
+        self._last_event_time = now
+        return now
+    
+    async def _flush_later(self) -> None:
+        """Flush buffered events after a short delay."""
+        await asyncio.sleep(_EVENT_FLUSH_DELAY)
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error("session_events_write_failed", error=str(e), pending=len(self._event_buffer))
+    
+    async def flush(self) -> None:
+        """
+        Write all buffered events in one transaction.
+        
+        Waits for a write already in progress (e.g. from the flush timer),
+        so every event added before the call is committed when it returns.
+        If the insert fails, the rows are put back in the buffer for the
+        next flush and the error is raised.
+        """
+        async with self._flush_lock:
+            if not self._event_buffer:
+                return
+            
+            rows, self._event_buffer = self._event_buffer, []
+            try:
+                await self._run_db(lambda db_session: db_session.execute(insert(SessionEvent), rows))
+            except Exception:
+                # Keep chronological order ahead of events buffered meanwhile
+                self._event_buffer[:0] = rows
+                raise
     
     async def get_context(self, session_id: str) -> Dict[str, Any]:
         """
@@ -100,13 +338,7 @@ class SessionContextManager:
         Returns:
             Session context dictionary
         """
-        with self.db_manager.get_session() as db_session:
-            session = db_session.query(Session).filter_by(id=session_id).first()
-            
-            if not session:
-                return {}
-            
-            return session.context or {}
+        return await self._get_json(Session.context, self._context_cache, session_id)
     
     async def update_context(
         self,
@@ -122,25 +354,26 @@ class SessionContextManager:
             context_updates: Context updates
             merge: Whether to merge with existing context (True) or replace (False)
         """
-        with self.db_manager.get_session() as db_session:
-            session = db_session.query(Session).filter_by(id=session_id).first()
+        if merge:
+            await self._merge_json(Session.context, session_id, context_updates)
+        else:
+            def replace(db_session: SQLASession) -> None:
+                db_session.execute(
+                    update(Session)
+                    .where(Session.id == session_id)
+                    .values(context=context_updates)
+                )
             
-            if session:
-                if merge:
-                    current_context = session.context or {}
-                    current_context.update(context_updates)
-                    session.context = current_context
-                else:
-                    session.context = context_updates
-                
-                session.updated_at = datetime.utcnow()
+            await self._run_db(replace)
+        
+        self._context_cache.pop(session_id, None)
     
     async def get_history(
         self,
         session_id: str,
         event_types: Optional[List[str]] = None,
         limit: int = 50
-    ) -> List[Dict[str, Any]]:
+    ) -> List[HistoryEvent]:
         """
         Get session event history.
         
@@ -150,33 +383,39 @@ class SessionContextManager:
             limit: Maximum events to return
         
         Returns:
-            List of events
+            Events in chronological order
         """
-        with self.db_manager.get_session() as db_session:
-            query = db_session.query(SessionEvent).filter_by(session_id=session_id)
+        await self.flush()
+        
+        def load(db_session: SQLASession) -> List[HistoryEvent]:
+            stmt = select(
+                SessionEvent.event_type,
+                SessionEvent.event_data,
+                SessionEvent.timestamp
+            ).where(SessionEvent.session_id == session_id)
             
             if event_types:
-                query = query.filter(SessionEvent.event_type.in_(event_types))
+                stmt = stmt.where(SessionEvent.event_type.in_(event_types))
             
-            events = query.order_by(SessionEvent.timestamp.desc()).limit(limit).all()
+            # Pick the latest events, then let the database return them in
+            # chronological order with timestamps already formatted
+            latest = stmt.order_by(SessionEvent.timestamp.desc()).limit(limit).subquery()
+            rows = db_session.execute(
+                select(
+                    latest.c.event_type,
+                    latest.c.event_data,
+                    iso_timestamp(latest.c.timestamp)
+                ).order_by(latest.c.timestamp.asc())
+            ).all()
             
-            return [
-                {
-                    "type": event.event_type,
-                    "data": event.event_data,
-                    "timestamp": event.timestamp.isoformat()
-                }
-                for event in reversed(events)  # Chronological order
-            ]
+            # Rows are already (type, data, timestamp) tuples
+            return list(map(HistoryEvent._make, rows))
+        
+        return await self._run_db(load)
     
     async def get_preferences(self, session_id: str) -> Dict[str, Any]:
         """Get user preferences from session."""
-        with self.db_manager.get_session() as db_session:
-            session = db_session.query(Session).filter_by(id=session_id).first()
-            
-            if session:
-                return session.preferences or {}
-            return {}
+        return await self._get_json(Session.preferences, self._preferences_cache, session_id)
     
     async def update_preferences(
         self,
@@ -184,27 +423,40 @@ class SessionContextManager:
         preferences: Dict[str, Any]
     ) -> None:
         """Update user preferences."""
-        with self.db_manager.get_session() as db_session:
-            session = db_session.query(Session).filter_by(id=session_id).first()
-            
-            if session:
-                current_prefs = session.preferences or {}
-                current_prefs.update(preferences)
-                session.preferences = current_prefs
+        await self._merge_json(Session.preferences, session_id, preferences)
+        self._preferences_cache.pop(session_id, None)
     
     async def close_session(self, session_id: str) -> None:
         """Close a session."""
-        with self.db_manager.get_session() as db_session:
-            session = db_session.query(Session).filter_by(id=session_id).first()
+        self._verified_until.pop(session_id, None)
+        self._context_cache.pop(session_id, None)
+        self._preferences_cache.pop(session_id, None)
+        await self.flush()
+        
+        def close(db_session: SQLASession) -> Optional[str]:
+            stmt = update(Session).where(Session.id == session_id).values(is_active=False)
             
-            if session:
-                session.is_active = False
-                
-                # Remove from active tracking
-                if session.user_id in self.active_sessions:
-                    del self.active_sessions[session.user_id]
-                
-                logger.info(f"Closed session {session_id[:8]}")
+            # One round-trip where UPDATE ... RETURNING is supported
+            if db_session.get_bind().dialect.update_returning:
+                return db_session.execute(stmt.returning(Session.user_id)).scalar_one_or_none()
+            
+            # Only the owner is needed, so skip loading the JSON columns
+            user_id = db_session.execute(
+                select(Session.user_id).where(Session.id == session_id)
+            ).scalar_one_or_none()
+            
+            if user_id is not None:
+                db_session.execute(stmt)
+            return user_id
+        
+        user_id = await self._run_db(close)
+        
+        if user_id is not None:
+            # Remove from active tracking
+            if user_id in self.active_sessions:
+                del self.active_sessions[user_id]
+            
+            logger.info("session_closed", session_id=session_id)
 
 
 # Global instance
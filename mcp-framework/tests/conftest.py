@@ -0,0 +1,13 @@
+"""Shared test setup: point the framework at a throwaway SQLite database."""
+
+import os
+import tempfile
+
+# Must be set before mcp_framework.config is imported
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='mcp_tests_'), 'test.db')}"
+)
+
+# Register tools before the gateway module imports the registry
+import mcp_framework.tools  # noqa: E402, F401
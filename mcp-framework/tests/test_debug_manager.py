@@ -0,0 +1,59 @@
+"""Tests for buffered resolution outcome writes."""
+
+import pytest
+
+from mcp_framework.server.debug_manager import DebugContextManager
+from mcp_framework.storage.models import Resolution
+
+
+async def make_resolution(manager, message):
+    """Capture an error and attach one resolution to it."""
+    try:
+        raise ValueError(message)
+    except ValueError as e:
+        error_id = await manager.capture_error(e, "finetune", {})
+    return await manager.add_resolution(error_id, "parameter_change", {"parameter": "lr"})
+
+
+def load_counts(manager, resolution_id):
+    """Read (applied_count, success_count) straight from the database."""
+    with manager.db_manager.get_session() as session:
+        resolution = session.get(Resolution, resolution_id)
+        return resolution.applied_count, resolution.success_count
+
+
+@pytest.mark.asyncio
+async def test_batched_outcomes_are_applied_once():
+    """Outcomes buffered across calls are written exactly once."""
+    manager = DebugContextManager()
+    resolution_id = await make_resolution(manager, "Missing parameter 'lr' in batch test")
+
+    for success in (True, True, False, True):
+        await manager.mark_resolution_success(resolution_id, success)
+    assert load_counts(manager, resolution_id) == (0, 0)
+
+    await manager.flush()
+    await manager.flush()
+    assert load_counts(manager, resolution_id) == (4, 3)
+
+
+@pytest.mark.asyncio
+async def test_failed_write_merges_counts_back(monkeypatch):
+    """Counts from a failed write are kept and written by the next flush."""
+    manager = DebugContextManager()
+    resolution_id = await make_resolution(manager, "Missing parameter 'lr' in retry test")
+
+    await manager.mark_resolution_success(resolution_id, True)
+    await manager.mark_resolution_success(resolution_id, False)
+
+    async def fail(work):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(manager, "_run_db", fail)
+    with pytest.raises(RuntimeError):
+        await manager.flush()
+    monkeypatch.undo()
+
+    await manager.mark_resolution_success(resolution_id, True)
+    await manager.flush()
+    assert load_counts(manager, resolution_id) == (3, 2)
@@ -0,0 +1,55 @@
+"""Tests for buffered session event writes."""
+
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import func, select
+
+from mcp_framework.server import mcp_gateway
+from mcp_framework.storage.models import SessionEvent
+from mcp_framework.user_side.session_manager import SessionContextManager, get_session_manager
+
+
+def count_events(manager, session_id):
+    """Count events written to the database, bypassing the buffer."""
+    with manager.db_manager.get_session() as db_session:
+        return db_session.scalar(
+            select(func.count()).select_from(SessionEvent).where(SessionEvent.session_id == session_id)
+        )
+
+
+@pytest.mark.asyncio
+async def test_events_are_buffered_until_flush():
+    """Events stay in memory until flush() writes them in order."""
+    manager = SessionContextManager()
+    session_id = await manager.create_session("buffer_user")
+
+    await manager.add_event(session_id, "user_message", {"i": 0})
+    await manager.add_event(session_id, "user_message", {"i": 1})
+    assert count_events(manager, session_id) == 0
+
+    await manager.flush()
+    assert count_events(manager, session_id) == 2
+
+    history = await manager.get_history(session_id)
+    assert [event.data["i"] for event in history] == [0, 1]
+    # Same fixed-width format on every backend
+    assert all(re.fullmatch(r"\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{3}", event.timestamp) for event in history)
+
+
+def test_gateway_shutdown_flushes_buffered_events():
+    """Events added just before the loop exits survive via the shutdown hook."""
+    manager = get_session_manager()
+
+    async def run():
+        session_id = await manager.create_session("shutdown_user")
+        await manager.add_event(session_id, "user_message", {"i": 0})
+        await manager.add_event(session_id, "user_message", {"i": 1})
+        await mcp_gateway.shutdown()
+        return session_id
+
+    # The flush timer is cancelled when asyncio.run returns
+    session_id = asyncio.run(run())
+
+    assert count_events(manager, session_id) == 2
@@ -0,0 +1,50 @@
+"""Tests for TaskPlanningAgent conversation history compaction."""
+
+from mcp_framework.agent.base_agent import Message
+from mcp_framework.agent.task_planning_agent import TaskPlanningAgent
+
+
+def make_agent(history, max_history_messages):
+    """Build an agent with only the state used by history compaction."""
+    agent = TaskPlanningAgent.__new__(TaskPlanningAgent)
+    agent.conversation_history = history
+    agent.max_history_messages = max_history_messages
+    return agent
+
+
+def test_compaction_keeps_parallel_tool_results_with_their_turn():
+    """N >= max_history_messages parallel tool results are never split off."""
+    max_messages = 20
+    results = [
+        Message(role="tool", content=f"result {i}", tool_call_id=f"t{i}")
+        for i in range(max_messages)
+    ]
+    history = [
+        Message(role="system", content="system"),
+        Message(role="user", content="question"),
+        Message(role="assistant", content="Using tools...", tool_calls=[{"id": "t0"}]),
+        *results,
+    ]
+    agent = make_agent(list(history), max_messages)
+
+    agent._compact_history()
+
+    assert agent.conversation_history == history
+
+
+def test_compaction_starts_window_on_user_message():
+    """Older turns are dropped whole and the window opens on a user message."""
+    history = [Message(role="system", content="system")]
+    for i in range(10):
+        history.append(Message(role="user", content=f"question {i}"))
+        history.append(Message(role="assistant", content="Using tools...", tool_calls=[{"id": f"t{i}"}]))
+        history.append(Message(role="tool", content="result", tool_call_id=f"t{i}"))
+        history.append(Message(role="assistant", content=f"answer {i}"))
+    agent = make_agent(list(history), 6)
+
+    agent._compact_history()
+
+    compacted = agent.conversation_history
+    assert compacted[0].role == "system"
+    assert compacted[1].role == "user"
+    assert compacted[1:] == history[-4:]
@@ -0,0 +1,203 @@
+"""Tests for the workflow executor's dataflow scheduler."""
+
+import asyncio
+import time
+from typing import Any, Dict
+
+import pytest
+from sqlalchemy import func, select
+
+from mcp_framework.server import workflow_executor
+from mcp_framework.server.tool_registry import get_tool_registry
+from mcp_framework.server.workflow_executor import WorkflowExecutor
+from mcp_framework.storage.database import get_db_manager
+from mcp_framework.storage.models import ToolExecution, WorkflowExecution
+from mcp_framework.tools.base import BaseTool, ToolCategory
+
+
+class _TestTool(BaseTool):
+    """Shared metadata for the tools below."""
+
+    @classmethod
+    def get_description(cls) -> str:
+        return cls.__doc__
+
+    @classmethod
+    def get_category(cls) -> ToolCategory:
+        return ToolCategory.UTILITY
+
+    @classmethod
+    def get_input_schema(cls) -> Dict[str, Any]:
+        return {"type": "object"}
+
+    @classmethod
+    def get_output_schema(cls) -> Dict[str, Any]:
+        return {"type": "object"}
+
+
+class SleepTool(_TestTool):
+    """Sleep, then echo the inputs."""
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "test_sleep"
+
+    async def execute(self, inputs: Dict[str, Any], runtime: Any = None) -> Dict[str, Any]:
+        await asyncio.sleep(inputs.get("seconds", 0))
+        return {"finished_at": time.monotonic(), **inputs}
+
+
+class FailTool(_TestTool):
+    """Always fail."""
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "test_fail"
+
+    async def execute(self, inputs: Dict[str, Any], runtime: Any = None) -> Dict[str, Any]:
+        raise RuntimeError("tool failed")
+
+
+class ProbeTool(_TestTool):
+    """Sleep, then count this tool's RUNNING rows in the database."""
+
+    @classmethod
+    def get_name(cls) -> str:
+        return "test_probe"
+
+    async def execute(self, inputs: Dict[str, Any], runtime: Any = None) -> Dict[str, Any]:
+        await asyncio.sleep(inputs["seconds"])
+
+        def count_running() -> int:
+            with get_db_manager().get_session() as session:
+                return session.scalar(
+                    select(func.count()).select_from(ToolExecution).where(
+                        ToolExecution.tool_name == self.get_name(),
+                        ToolExecution.status == "RUNNING"
+                    )
+                )
+
+        return {"running_rows": await asyncio.to_thread(count_running)}
+
+
+for _tool in (SleepTool, FailTool, ProbeTool):
+    get_tool_registry().register(_tool)
+
+
+def load_rows(workflow_id):
+    """Load the workflow row and its tool rows keyed by tool name."""
+    with get_db_manager().get_session() as session:
+        workflow = session.get(WorkflowExecution, workflow_id)
+        executions = session.scalars(
+            select(ToolExecution).where(ToolExecution.workflow_id == workflow_id)
+        ).all()
+        return workflow, {execution.tool_name: execution for execution in executions}
+
+
+@pytest.mark.asyncio
+async def test_node_waits_for_all_dependencies():
+    """A node starts only after every upstream node, with mapped inputs."""
+    dag = {
+        "nodes": [
+            {"id": "a", "tool": "load_dataset", "inputs": {"dataset_path": "ordering"}},
+            {"id": "c", "tool": "test_sleep", "inputs": {"seconds": 0.05}},
+            {
+                "id": "b",
+                "tool": "test_sleep",
+                "inputs": {"seconds": 0},
+                "input_mappings": {"a.dataset_id": "dataset_id"}
+            }
+        ],
+        "edges": [{"from": "a", "to": "b"}, {"from": "c", "to": "b"}]
+    }
+
+    events = [event async for event in WorkflowExecutor().execute_streaming(dag)]
+
+    completed = [event["node_id"] for event in events if event["type"] == "node_completed"]
+    assert completed.index("b") == 2
+    results = events[-1]["results"]
+    assert results["b"]["dataset_id"] == results["a"]["dataset_id"]
+    assert results["b"]["finished_at"] >= results["c"]["finished_at"]
+
+
+@pytest.mark.asyncio
+async def test_failure_waits_for_running_sibling():
+    """A failure closes running siblings' records before the workflow is marked FAILED."""
+    dag = {
+        "nodes": [
+            {"id": "slow", "tool": "test_sleep", "inputs": {"seconds": 0.2}},
+            {"id": "bad", "tool": "test_fail", "inputs": {}},
+            {"id": "after", "tool": "load_config", "inputs": {"config": {}}}
+        ],
+        "edges": [{"from": "slow", "to": "after"}]
+    }
+
+    started = time.monotonic()
+    events = []
+    async for event in WorkflowExecutor().execute_streaming(dag):
+        events.append((event, time.monotonic() - started))
+
+    types = [event["type"] for event, _ in events]
+    assert types == ["start", "node_failed"]
+    failed_event, failed_at = events[1]
+    assert failed_event["node_id"] == "bad"
+    # Reported as soon as it happens, not after the sibling finishes
+    assert failed_at < 0.2
+
+    workflow, executions = load_rows(events[0][0]["workflow_id"])
+    assert workflow.status == "FAILED"
+    assert "bad" in workflow.error_message
+    assert executions["test_fail"].status == "FAILED"
+    assert executions["test_sleep"].status == "COMPLETED"
+    assert executions["test_sleep"].completed_at <= workflow.completed_at
+    assert "load_config" not in executions
+
+
+@pytest.mark.asyncio
+async def test_long_running_node_gets_a_running_row():
+    """A node outliving the write delay is visible as RUNNING while it runs."""
+    seconds = workflow_executor._RUNNING_WRITE_DELAY * 4
+    dag = {
+        "nodes": [{"id": "probe", "tool": "test_probe", "inputs": {"seconds": seconds}}],
+        "edges": []
+    }
+
+    events = [event async for event in WorkflowExecutor().execute_streaming(dag)]
+
+    assert events[-1]["type"] == "workflow_completed"
+    assert events[-1]["results"]["probe"]["running_rows"] == 1
+
+    _, executions = load_rows(events[0]["workflow_id"])
+    assert executions["test_probe"].status == "COMPLETED"
+
+
+@pytest.mark.asyncio
+async def test_fast_node_is_written_once_finished():
+    """A node finishing within the write delay never has a RUNNING row."""
+    dag = {
+        "nodes": [{"id": "probe", "tool": "test_probe", "inputs": {"seconds": 0}}],
+        "edges": []
+    }
+
+    events = [event async for event in WorkflowExecutor().execute_streaming(dag)]
+
+    assert events[-1]["results"]["probe"]["running_rows"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_is_recorded_as_completed():
+    """A node served from the result cache gets a zero-duration COMPLETED row."""
+    dag = {
+        "nodes": [{"id": "a", "tool": "load_dataset", "inputs": {"dataset_path": "cache_hit"}}],
+        "edges": []
+    }
+    executor = WorkflowExecutor()
+
+    first = [event async for event in executor.execute_streaming(dag)]
+    second = [event async for event in executor.execute_streaming(dag)]
+
+    assert second[-1]["results"] == first[-1]["results"]
+    _, executions = load_rows(second[0]["workflow_id"])
+    execution = executions["load_dataset"]
+    assert execution.status == "COMPLETED"
+    assert execution.completed_at == execution.started_at